@@ -0,0 +1,75 @@
+import argparse
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+from config.backend.vectorstore import VECTORSTORE_BUILD_MAX_WORKERS
+from utils.backend.all import load_student_metadata_from_s3
+from utils.backend.ingestion import ingest_student_documents
+from utils.backend.vectorstore import (
+    build_student_vectorstore,
+    load_vectorstore_manifest,
+    save_vectorstore_manifest,
+    update_manifest_entry
+)
+from utils.shared.logger import backend_logger
+
+# Function to build the vectorstores of all (or the given) students and record them in the S3 manifest.
+# Source documents are first ingested into chunk records across a worker pool, then each student's store is embedded and uploaded in a process pool.
+def build_all_vectorstores(student_names: list[str] = None, max_workers: int = VECTORSTORE_BUILD_MAX_WORKERS) -> tuple[bool, str]:
+    success = False
+    message = ""
+
+    if not student_names:
+        s3_success, s3_message, students = load_student_metadata_from_s3()
+        if not s3_success or not students:
+            message = f"Failed to load student profiles from S3: {s3_message}"
+            backend_logger.error(f"build_all_vectorstores | {message}")
+            return success, message
+        student_names = [student.get('student_name') for student in students]
+
+    manifest_success, manifest_message, manifest = load_vectorstore_manifest()
+    if not manifest_success:
+        message = f"Failed to load vectorstore manifest: {manifest_message}"
+        backend_logger.error(f"build_all_vectorstores | {message}")
+        return success, message
+
+    ingest_success, ingest_message, student_chunks = ingest_student_documents(student_names=student_names, max_workers=max_workers)
+    if not ingest_success:
+        message = f"Failed to ingest source documents: {ingest_message}"
+        backend_logger.error(f"build_all_vectorstores | {message}")
+        return success, message
+
+    # Worker processes are spawned rather than forked so that no boto3 connection state is shared with the parent.
+    failed_students = []
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(student_names)), mp_context=multiprocessing.get_context("spawn")) as executor:
+        for student_name, (build_success, build_message, build_data) in zip(student_names, executor.map(build_student_vectorstore, student_names, [student_chunks[student_name] for student_name in student_names])):
+            if not build_success:
+                backend_logger.error(f"build_all_vectorstores | {build_message}")
+                failed_students.append(student_name)
+                continue
+            manifest = update_manifest_entry(manifest, student_name, build_data)
+
+    save_success, save_message = save_vectorstore_manifest(manifest)
+    if not save_success:
+        message = f"Failed to save vectorstore manifest: {save_message}"
+        backend_logger.error(f"build_all_vectorstores | {message}")
+        return success, message
+
+    if failed_students:
+        message = f"Failed to build vectorstores for students: {', '.join(failed_students)}"
+        backend_logger.error(f"build_all_vectorstores | {message}")
+        return success, message
+
+    return True, f"Built vectorstores for {len(student_names)} students"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build per-student vectorstores and upload them to S3.")
+    parser.add_argument("students", nargs="*", help="Student names to build (default: every student in the metadata file)")
+    parser.add_argument("--workers", type=int, default=VECTORSTORE_BUILD_MAX_WORKERS, help="Number of worker processes")
+    args = parser.parse_args()
+
+    success, message = build_all_vectorstores(student_names=args.students, max_workers=max(1, args.workers))
+    if success:
+        backend_logger.info(f"All vectorstores have been built successfully | {message}")
+    else:
+        backend_logger.error(f"Vectorstore build failed: {message}")
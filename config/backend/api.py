@@ -1,3 +1,7 @@
-from utils.shared.env import validate_env_var
+from utils.shared.env import validate_env_var, validate_int_env_var
 
-BACKEND_API_KEY = validate_env_var("BACKEND_API_KEY")
\ No newline at end of file
+BACKEND_API_KEY = validate_env_var("BACKEND_API_KEY")
+
+# Results of completed mutating requests are replayed to duplicates carrying the same Idempotency-Key for this long.
+IDEMPOTENCY_RESULT_TTL_SECONDS = max(1, validate_int_env_var("IDEMPOTENCY_RESULT_TTL_SECONDS", required=False, default=300))
+IDEMPOTENCY_MAX_RESULTS = max(1, validate_int_env_var("IDEMPOTENCY_MAX_RESULTS", required=False, default=10000))
\ No newline at end of file
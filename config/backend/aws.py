@@ -1,6 +1,9 @@
-from utils.shared.env import validate_env_var
+from utils.shared.env import validate_env_var, validate_int_env_var
 
 AWS_ACCESS_KEY_ID = validate_env_var("AWS_ACCESS_KEY_ID") 
 AWS_SECRET_ACCESS_KEY = validate_env_var("AWS_SECRET_ACCESS_KEY")
 AWS_DEFAULT_REGION = validate_env_var("AWS_DEFAULT_REGION")
-AWS_REGION = validate_env_var("AWS_REGION", required=False, default=AWS_DEFAULT_REGION)
\ No newline at end of file
+AWS_REGION = validate_env_var("AWS_REGION", required=False, default=AWS_DEFAULT_REGION)
+
+# Maximum number of pooled HTTP connections kept open by each cached boto3 client/resource.
+AWS_MAX_POOL_CONNECTIONS = max(1, validate_int_env_var("AWS_MAX_POOL_CONNECTIONS", required=False, default=10))
\ No newline at end of file
@@ -86,4 +86,8 @@ DYNAMODB_CHAT_MESSAGES_TABLE_CONFIG = {
         {'AttributeName': 'message_timestamp', 'AttributeType': 'S'}
     ],
     'BillingMode': 'PAY_PER_REQUEST'
-}
\ No newline at end of file
+}
+
+# In-process chat history cache of the backend: maximum number of cached sessions and idle time after which a session is evicted.
+CHAT_HISTORY_CACHE_MAX_SESSIONS = max(1, validate_int_env_var("CHAT_HISTORY_CACHE_MAX_SESSIONS", required=False, default=1000))
+CHAT_HISTORY_CACHE_IDLE_SECONDS = max(1, validate_int_env_var("CHAT_HISTORY_CACHE_IDLE_SECONDS", required=False, default=1800))
\ No newline at end of file
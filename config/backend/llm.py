@@ -0,0 +1,63 @@
+from utils.shared.env import validate_env_var, validate_int_env_var, validate_float_env_var
+
+RESPONSE_GENERATION_MODEL_ID = validate_env_var("RESPONSE_GENERATION_MODEL_ID")
+RESPONSE_GENERATION_MODEL_TEMPERATURE = validate_float_env_var("RESPONSE_GENERATION_MODEL_TEMPERATURE")
+RESPONSE_GENERATION_MODEL_MAX_TOKENS = validate_int_env_var("RESPONSE_GENERATION_MODEL_MAX_TOKENS")
+
+# Model used to rewrite follow-up questions into standalone questions before retrieval.
+CONTEXTUALIZATION_MODEL_ID = validate_env_var("CONTEXTUALIZATION_MODEL_ID", required=False, default=RESPONSE_GENERATION_MODEL_ID)
+CONTEXTUALIZATION_MODEL_MAX_TOKENS = validate_int_env_var("CONTEXTUALIZATION_MODEL_MAX_TOKENS", required=False, default=128)
+
+# Bedrock prompt caching of the stable SYSTEM_PROMPT_MAIN prefix. It is only requested for models that support it.
+RESPONSE_GENERATION_PROMPT_CACHING = validate_env_var(
+    "RESPONSE_GENERATION_PROMPT_CACHING",
+    required=False,
+    default="true",
+    allowed_values=["true", "false"]
+) == "true"
+# Models that support Bedrock prompt caching and the minimum number of tokens a prefix needs before its cache point;
+# Bedrock silently ignores a cache point placed after a shorter prefix.
+PROMPT_CACHING_MIN_TOKENS = {
+    "anthropic.claude-3-5-haiku": 2048,
+    "anthropic.claude-3-7-sonnet": 1024,
+    "anthropic.claude-sonnet-4": 1024,
+    "anthropic.claude-opus-4": 1024,
+    "amazon.nova-micro": 1000,
+    "amazon.nova-lite": 1000,
+    "amazon.nova-pro": 1000,
+    "amazon.nova-premier": 1000
+}
+
+# Model and length of the persona card distilled from each student's documents by the vectorstore build.
+PERSONA_CARD_MODEL_ID = validate_env_var("PERSONA_CARD_MODEL_ID", required=False, default=RESPONSE_GENERATION_MODEL_ID)
+PERSONA_CARD_MODEL_MAX_TOKENS = validate_int_env_var("PERSONA_CARD_MODEL_MAX_TOKENS", required=False, default=2048)
+PERSONA_CARD_MAX_WORDS = max(50, validate_int_env_var("PERSONA_CARD_MAX_WORDS", required=False, default=300))
+
+# Token budget of the chat history sent with each turn. Older turns are folded into a rolling summary stored on the chat session item,
+# down to CHAT_HISTORY_FOLD_RATIO of the budget at a time so the summary model is not called on every turn.
+CHAT_HISTORY_MAX_TOKENS = max(100, validate_int_env_var("CHAT_HISTORY_MAX_TOKENS", required=False, default=2000))
+CHAT_HISTORY_MIN_RECENT_MESSAGES = max(2, validate_int_env_var("CHAT_HISTORY_MIN_RECENT_MESSAGES", required=False, default=4))
+CHAT_HISTORY_FOLD_RATIO = min(1.0, max(0.1, validate_float_env_var("CHAT_HISTORY_FOLD_RATIO", required=False, default=0.5)))
+CHAT_HISTORY_SUMMARY_MODEL_ID = validate_env_var("CHAT_HISTORY_SUMMARY_MODEL_ID", required=False, default=CONTEXTUALIZATION_MODEL_ID)
+CHAT_HISTORY_SUMMARY_MAX_TOKENS = validate_int_env_var("CHAT_HISTORY_SUMMARY_MAX_TOKENS", required=False, default=400)
+
+# Speculative answers to the suggested next questions: whether they are generated, how many generations of one user run at once,
+# and how long an uncommitted draft stays valid.
+SPECULATIVE_ANSWERS_ENABLED = validate_env_var(
+    "SPECULATIVE_ANSWERS_ENABLED",
+    required=False,
+    default="true",
+    allowed_values=["true", "false"]
+) == "true"
+SPECULATIVE_ANSWERS_MAX_CONCURRENCY_PER_USER = max(1, validate_int_env_var("SPECULATIVE_ANSWERS_MAX_CONCURRENCY_PER_USER", required=False, default=2))
+SPECULATIVE_ANSWERS_MAX_QUESTIONS = max(1, validate_int_env_var("SPECULATIVE_ANSWERS_MAX_QUESTIONS", required=False, default=4))
+SPECULATIVE_ANSWERS_TTL_SECONDS = max(1, validate_int_env_var("SPECULATIVE_ANSWERS_TTL_SECONDS", required=False, default=600))
+# How long a turn waits for the draft of its question that is still being generated before it generates the answer itself.
+# About one normal answer generation: a draft that takes longer is stuck or queued, and waiting on it would only delay the turn.
+SPECULATIVE_ANSWERS_COMMIT_WAIT_SECONDS = max(1, validate_int_env_var("SPECULATIVE_ANSWERS_COMMIT_WAIT_SECONDS", required=False, default=15))
+
+# Shared answer cache for first turns (history is only the system greeting): number of cached questions and how many
+# answer samples are collected per question. Answers are served from the first stored sample, with a probability growing
+# to 1 as the samples are collected (see get_first_turn_answer).
+FIRST_TURN_ANSWER_CACHE_SIZE = max(0, validate_int_env_var("FIRST_TURN_ANSWER_CACHE_SIZE", required=False, default=512))
+FIRST_TURN_ANSWER_VARIANTS = max(1, validate_int_env_var("FIRST_TURN_ANSWER_VARIANTS", required=False, default=3))
\ No newline at end of file
@@ -2,4 +2,7 @@ from utils.shared.env import validate_env_var
 
 MAIN_S3_BUCKET_NAME = validate_env_var("MAIN_S3_BUCKET_NAME")
 STUDENT_METADATA_FILE_NAME = validate_env_var("STUDENT_METADATA_FILE_NAME")
-STUDENT_METADATA_FOLDER_PATH = validate_env_var("STUDENT_METADATA_FOLDER_PATH")
\ No newline at end of file
+STUDENT_METADATA_FOLDER_PATH = validate_env_var("STUDENT_METADATA_FOLDER_PATH")
+STUDENT_DOCUMENTS_FOLDER_PATH = validate_env_var("STUDENT_DOCUMENTS_FOLDER_PATH", required=False, default="student-documents")
+STUDENT_VECTORSTORE_FOLDER_PATH = validate_env_var("STUDENT_VECTORSTORE_FOLDER_PATH")
+STUDENT_VECTORSTORE_MANIFEST_FILE_NAME = validate_env_var("STUDENT_VECTORSTORE_MANIFEST_FILE_NAME", required=False, default="manifest.json")
\ No newline at end of file
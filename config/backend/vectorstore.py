@@ -0,0 +1,44 @@
+import os
+
+from utils.shared.env import validate_env_var, validate_float_env_var, validate_int_env_var
+
+LOCAL_VECTORSTORES_DIRECTORY = validate_env_var("LOCAL_VECTORSTORES_DIRECTORY", required=False, default="local-student-vectorstores")
+
+DOCUMENT_EMBEDDING_MODEL_ID = validate_env_var("DOCUMENT_EMBEDDING_MODEL_ID")
+DOCUMENT_EMBEDDING_BATCH_SIZE = max(1, validate_int_env_var("DOCUMENT_EMBEDDING_BATCH_SIZE", required=False, default=32))
+
+# Chunk size and overlap are measured in characters.
+DOCUMENT_CHUNK_SIZE = max(100, validate_int_env_var("DOCUMENT_CHUNK_SIZE", required=False, default=1000))
+DOCUMENT_CHUNK_OVERLAP = min(DOCUMENT_CHUNK_SIZE // 2, max(0, validate_int_env_var("DOCUMENT_CHUNK_OVERLAP", required=False, default=200)))
+
+VECTORSTORE_BUILD_MAX_WORKERS = max(1, validate_int_env_var("VECTORSTORE_BUILD_MAX_WORKERS", required=False, default=os.cpu_count() or 1))
+
+# Number of chunks retrieved from a student's vectorstore to fill the {context} of the main prompt.
+RAG_MAX_DOC_RETRIEVE = max(1, validate_int_env_var("RAG_MAX_DOC_RETRIEVE", required=False, default=5))
+
+# Disk budget of LOCAL_VECTORSTORES_DIRECTORY; least recently used student stores are evicted above it.
+LOCAL_VECTORSTORES_MAX_BYTES = max(1, validate_int_env_var("LOCAL_VECTORSTORES_MAX_BYTES", required=False, default=1024 * 1024 * 1024))
+
+# How often the S3 manifest is re-read to detect stale local stores.
+VECTORSTORE_MANIFEST_REFRESH_SECONDS = max(0, validate_int_env_var("VECTORSTORE_MANIFEST_REFRESH_SECONDS", required=False, default=300))
+
+# In-memory format of loaded embedding matrices: float32 (exact), float16 or int8 with per-vector scale factors.
+VECTORSTORE_INDEX_DTYPE = validate_env_var(
+    "VECTORSTORE_INDEX_DTYPE",
+    required=False,
+    default="float32",
+    allowed_values=["float32", "float16", "int8"]
+)
+
+# Hybrid retrieval: weight of the BM25 score in the fused ranking, and when BM25 alone is decisive enough to skip embedding the question.
+RAG_LEXICAL_WEIGHT = min(1.0, max(0.0, validate_float_env_var("RAG_LEXICAL_WEIGHT", required=False, default=0.3)))
+RAG_LEXICAL_DECISIVE_SCORE = validate_float_env_var("RAG_LEXICAL_DECISIVE_SCORE", required=False, default=8.0)
+RAG_LEXICAL_DECISIVE_RATIO = validate_float_env_var("RAG_LEXICAL_DECISIVE_RATIO", required=False, default=2.0)
+
+# Retrieval result cache: number of cached (student, store version, question) results, and how similar (word Jaccard)
+# a follow-up must be to the previous turn's question of the same session to reuse its chunks.
+RAG_RESULT_CACHE_SIZE = max(0, validate_int_env_var("RAG_RESULT_CACHE_SIZE", required=False, default=1024))
+RAG_FOLLOW_UP_REUSE_SIMILARITY = min(1.0, max(0.0, validate_float_env_var("RAG_FOLLOW_UP_REUSE_SIMILARITY", required=False, default=0.85)))
+
+# Number of chunks retrieved on top of the persona card when a student's store has one (0 sends the card alone).
+RAG_MAX_DOC_RETRIEVE_WITH_PERSONA_CARD = max(0, validate_int_env_var("RAG_MAX_DOC_RETRIEVE_WITH_PERSONA_CARD", required=False, default=2))
\ No newline at end of file
@@ -1,4 +1,8 @@
-from utils.shared.env import validate_env_var
+from utils.shared.env import validate_env_var, validate_int_env_var
 
 BACKEND_API_URL = validate_env_var("BACKEND_API_URL")
-BACKEND_API_KEY = validate_env_var("BACKEND_API_KEY")
\ No newline at end of file
+BACKEND_API_KEY = validate_env_var("BACKEND_API_KEY")
+
+# Timeout of backend calls that run in the background of a page (/start-chat, /get-chat-history), so that a hung request
+# fails and is retried instead of blocking the page forever.
+BACKEND_API_TIMEOUT_SECONDS = max(1, validate_int_env_var("BACKEND_API_TIMEOUT_SECONDS", required=False, default=30))
@@ -2,4 +2,10 @@ from utils.shared.env import validate_env_var, validate_int_env_var, validate_fl
 
 QUESTIONS_GENERATION_MODEL_ID = validate_env_var("QUESTIONS_GENERATION_MODEL_ID")
 QUESTIONS_GENERATION_MODEL_TEMPERATURE = validate_float_env_var("QUESTIONS_GENERATION_MODEL_TEMPERATURE")
-QUESTIONS_GENERATION_MODEL_MAX_TOKENS = validate_int_env_var("QUESTIONS_GENERATION_MODEL_MAX_TOKENS")
\ No newline at end of file
+QUESTIONS_GENERATION_MODEL_MAX_TOKENS = validate_int_env_var("QUESTIONS_GENERATION_MODEL_MAX_TOKENS")
+
+# Process-wide limit on concurrent LLM calls from the Streamlit node. It starts at LLM_INITIAL_CONCURRENCY, grows additively while calls succeed
+# and is halved on throttling, staying between LLM_MIN_CONCURRENCY and LLM_MAX_CONCURRENCY.
+LLM_MAX_CONCURRENCY = max(1, validate_int_env_var("LLM_MAX_CONCURRENCY", required=False, default=16))
+LLM_MIN_CONCURRENCY = min(LLM_MAX_CONCURRENCY, max(1, validate_int_env_var("LLM_MIN_CONCURRENCY", required=False, default=1)))
+LLM_INITIAL_CONCURRENCY = min(LLM_MAX_CONCURRENCY, max(LLM_MIN_CONCURRENCY, validate_int_env_var("LLM_INITIAL_CONCURRENCY", required=False, default=8)))
\ No newline at end of file
@@ -1,5 +1,27 @@
-from utils.shared.env import validate_env_var
+from utils.shared.env import validate_env_var, validate_int_env_var
 
 APP_LOGO_URL = validate_env_var("APP_LOGO_URL")
 DEFAULT_PROFILE_IMAGE_URL = validate_env_var("DEFAULT_PROFILE_IMAGE_URL")
-STUDENT_IMAGE_URL = validate_env_var("STUDENT_IMAGE_URL")
\ No newline at end of file
+STUDENT_IMAGE_URL = validate_env_var("STUDENT_IMAGE_URL")
+
+# Number of messages the live chat fragment renders before the page is rerun in full to make them part of the static history.
+LIVE_CHAT_MAX_MESSAGES = max(2, validate_int_env_var("LIVE_CHAT_MAX_MESSAGES", required=False, default=20))
+# Number of most recent messages a full run of the chat page draws; earlier ones are only drawn on request, so a full run
+# costs the same however long the chat is.
+STATIC_CHAT_MAX_MESSAGES = max(2, validate_int_env_var("STATIC_CHAT_MAX_MESSAGES", required=False, default=40))
+# Chat histories of Streamlit sessions idle for longer than this are trimmed to a stub and reloaded when the session comes back.
+CHAT_SESSION_IDLE_TRIM_SECONDS = max(60, validate_int_env_var("CHAT_SESSION_IDLE_TRIM_SECONDS", required=False, default=1800))
+# Memory ceiling of the chat histories held by the node; above it, the least recently active sessions are trimmed first.
+CHAT_HISTORY_MEMORY_CEILING_BYTES = max(1, validate_int_env_var("CHAT_HISTORY_MEMORY_CEILING_BYTES", required=False, default=256 * 1024 * 1024))
+# Histories of resumable chat sessions are prefetched by the students page, at most this many at a time on the node.
+HISTORY_PREFETCH_MAX_CONCURRENCY = max(1, validate_int_env_var("HISTORY_PREFETCH_MAX_CONCURRENCY", required=False, default=4))
+# A prefetched history older than this is fetched again, since the session may have moved on in another tab.
+HISTORY_PREFETCH_TTL_SECONDS = max(1, validate_int_env_var("HISTORY_PREFETCH_TTL_SECONDS", required=False, default=60))
+# Whether the suggested next questions are sent to the backend's /speculate-answers route to be pre-answered as drafts.
+# Off until the backend server exposes that route.
+ANSWER_SPECULATION_ENABLED = validate_env_var(
+    "ANSWER_SPECULATION_ENABLED",
+    required=False,
+    default="false",
+    allowed_values=["true", "false"]
+) == "true"
@@ -4,28 +4,124 @@ import streamlit as st
 from urllib.parse import urlparse
 from utils.frontend.api_calls import get_student_profiles
 from utils.frontend.all import (
+    ensure_chat_history_loaded,
+    generate_next_questions,
+    get_latest_turn_messages,
     handle_user_input,
+    is_history_load_overdue,
     is_kannada,
     render_chat_history,
     render_chat_subheader,
     render_next_questions,
+    save_session_snapshot,
     security_check,
-    setup_page
+    setup_page,
+    start_answer_speculation
 )
+from utils.frontend.session_registry import get_chat_session_registry
 from utils.shared.errors import get_user_error
 from utils.shared.logger import frontend_logger
 from config.frontend.other import (
+    LIVE_CHAT_MAX_MESSAGES,
+    STATIC_CHAT_MAX_MESSAGES,
     STUDENT_IMAGE_URL
 )
 
 setup_page(initial_sidebar_state="expanded")
 
-async def render_chat_page():
+# Function to render the suggested questions in the sidebar. Returns the clicked question, if any.
+# The suggestions of a turn are generated here once its answer is drawn, unless another question was already sent.
+def render_suggestions(student_name: str, generate: bool = True) -> str | None:
+    current_chat_session = st.session_state["active_chat_session"]
+    if current_chat_session["next_questions"] is None:
+        if not generate:
+            return None
+        with st.spinner(text="Loading suggestions..."):
+            current_chat_session["next_questions"] = asyncio.run(generate_next_questions(
+                chat_history=current_chat_session["chat_history"],
+                student_name=student_name
+            ))
+        save_session_snapshot(chat_session_id=current_chat_session["id"], next_questions=current_chat_session["next_questions"], chat_history=current_chat_session["chat_history"])
+        start_answer_speculation(chat_session_id=current_chat_session["id"], next_questions=current_chat_session["next_questions"], student_name=student_name)
+
+    return render_next_questions(next_questions=current_chat_session["next_questions"])
+
+# Fragment holding the conversation as it grows: the messages appended since the last full run of the page, the chat input
+# and the suggested questions, which it writes to the sidebar. Sending a question, typed or clicked, reruns only this fragment,
+# so the earlier history is not redrawn; the suggestions of the new turn are generated after its answer is drawn, without a timer.
+@st.fragment
+def render_live_chat(student_name: str, student_avatar: str):
+    current_chat_session = st.session_state["active_chat_session"]
+    chat_history = current_chat_session["chat_history"]
+    static_message_count = st.session_state.get("static_message_count", 0)
+
+    # A history trimmed while the session was idle is reloaded by a full run of the page.
+    if current_chat_session.get("history_trimmed") or len(chat_history) - static_message_count > LIVE_CHAT_MAX_MESSAGES:
+        st.rerun(scope="app")
+    get_chat_session_registry().touch(current_chat_session)
+
+    render_chat_history(chat_history=chat_history[static_message_count:])
+
+    # A suggestion clicked while the history was loading is sent once it is loaded.
+    queued_question = current_chat_session.pop("queued_question", None)
+    user_input = st.chat_input(placeholder=f"Please type your question here")
+    with st.sidebar:
+        clicked_question = render_suggestions(student_name=student_name, generate=not (user_input or queued_question))
+
+    if clicked_question or queued_question:
+        user_input = clicked_question or queued_question
+        input_type = "button"
+    elif user_input:
+        if is_kannada(user_input):
+            input_type = "manual-kannada"
+            frontend_logger.info(f"render_live_chat | Translating Kannada question: {user_input}")
+        else:
+            input_type = "manual-english"
+            frontend_logger.info(f"render_live_chat | Input is English: {user_input}")
+
+        if user_input.strip() == "":
+            st.error("Please enter a question.")
+            return
+    else:
+        return
+
+    asyncio.run(handle_user_input(
+        user_input=user_input,
+        current_chat_session=current_chat_session,
+        student_name=student_name,
+        student_avatar=student_avatar,
+        input_type=input_type
+    ))
+
+# Fragment holding the messages older than the ones drawn by a full run of the page. They are drawn when the instructor asks for them,
+# until the next full run; showing them reruns only this fragment.
+@st.fragment
+def render_earlier_history(message_count: int):
+    if st.button(label=f"Show {message_count} earlier messages", icon=":material/history:", key="show_earlier_messages"):
+        render_chat_history(chat_history=st.session_state["active_chat_session"]["chat_history"][:message_count])
+
+# Fragment shown while the history of a resumed session is loading. The page renders from the session snapshot right away
+# (history summary and latest turn here, suggested questions in the sidebar) and reruns in full once the history is there,
+# or once its load is overdue and the full run loads it directly.
+@st.fragment(run_every=0.5)
+def render_pending_history(current_chat_session: dict, student_avatar: str):
+    history_future = current_chat_session.get("history_future")
+    if history_future is None or history_future.done() or is_history_load_overdue(current_chat_session):
+        st.rerun(scope="app")
+
+    if current_chat_session.get("history_summary"):
+        st.caption(f"Earlier in this chat: {current_chat_session['history_summary']}")
+    st.caption("Loading messages...")
+    render_chat_history(chat_history=get_latest_turn_messages(current_chat_session, student_avatar=student_avatar))
+    if current_chat_session.get("queued_question"):
+        st.caption(f"Your question will be sent once the messages are loaded: {current_chat_session['queued_question']}")
+
+def render_chat_page():
     security_check()
 
     if "active_chat_session" not in st.session_state or len(st.session_state["active_chat_session"]) == 0:
         st.switch_page(page="pages/students.py")
-    
+
     current_chat_session = st.session_state["active_chat_session"]
     if current_chat_session:
         student_name = current_chat_session["student_profile"]["student_name"]
@@ -34,7 +130,7 @@ async def render_chat_page():
         frontend_logger.error(f"render_chat_page | No active chat session found for user {getattr(st.user, 'email')}")
         st.error(get_user_error())
         st.stop()
-    
+
     render_chat_subheader(student_name)
 
     with st.sidebar:
@@ -42,33 +138,24 @@ async def render_chat_page():
         if st.button(label="Chat with another student", icon=":material/arrow_back:", type="primary", use_container_width=True):
             get_student_profiles.clear()
             st.switch_page(page="pages/students.py")
-        st.markdown("---")
-    
-    render_chat_history(chat_history=current_chat_session["chat_history"])
 
-    user_input = st.chat_input(placeholder=f"Please type your question here")
-    await render_next_questions(next_questions=current_chat_session["next_questions"])
+    if not ensure_chat_history_loaded(current_chat_session=current_chat_session, student_avatar=student_avatar):
+        if not current_chat_session.get("queued_question"):
+            with st.sidebar:
+                current_chat_session["queued_question"] = render_next_questions(next_questions=current_chat_session["next_questions"])
+        render_pending_history(current_chat_session=current_chat_session, student_avatar=student_avatar)
+        return
 
-    if user_input:
-        if is_kannada(user_input):
-            input_type = "manual-kannada"
-            frontend_logger.info(f"render_chat_page | Translating Kannada question: {user_input}")
-        else:
-            input_type = "manual-english"
-            frontend_logger.info(f"render_chat_page | Input is English: {user_input}")
-        
-        if user_input.strip() == "":
-            st.error("Please enter a question.")
-            return
-        
-        await handle_user_input(
-            user_input=user_input,
-            current_chat_session=current_chat_session,
-            student_name=student_name,
-            student_avatar=student_avatar,
-            input_type=input_type
-        )
-        st.rerun()
+    # Messages present at a full run are static; later ones are drawn by the live chat fragment.
+    # Only the last STATIC_CHAT_MAX_MESSAGES of them are drawn right away.
+    chat_history = current_chat_session["chat_history"]
+    st.session_state["static_message_count"] = len(chat_history)
+    earlier_message_count = max(0, len(chat_history) - STATIC_CHAT_MAX_MESSAGES)
+    if earlier_message_count:
+        render_earlier_history(message_count=earlier_message_count)
+    render_chat_history(chat_history=chat_history[earlier_message_count:])
+
+    render_live_chat(student_name=student_name, student_avatar=student_avatar)
 
 if __name__ == "__main__":
-    asyncio.run(render_chat_page())
\ No newline at end of file
+    render_chat_page()
@@ -2,6 +2,7 @@ import streamlit as st
 
 from utils.frontend.all import (
     add_text,
+    generate_uuid,
     reset_session_state,
     security_check,
     setup_page
@@ -39,17 +40,23 @@ def render_home_page():
                 st.cache_resource.clear()
                 st.logout()
                 
+                # The nonce is kept until the call succeeds, so a rerun or double click resends the same request.
+                if "end_all_chats_nonce" not in st.session_state:
+                    st.session_state["end_all_chats_nonce"] = generate_uuid()
                 try:
                     end_all_success, end_all_message = end_all_chats(
                         user_email=user_email,
-                        login_session_id=login_session_id
+                        login_session_id=login_session_id,
+                        request_nonce=st.session_state["end_all_chats_nonce"]
                     )
                 except Exception as e:
                     frontend_logger.error(f"render_home_page | Error: {str(e)}")
                     st.error(get_user_error())
                     st.stop()
                 
-                if not end_all_success:
+                if end_all_success:
+                    st.session_state.pop("end_all_chats_nonce", None)
+                else:
                     frontend_logger.warning(f"render_home_page | Failed to end all chats on logout: {end_all_message}")
 
         st.markdown("---", unsafe_allow_html=True)
@@ -5,6 +5,7 @@ from utils.frontend.api_calls import get_student_profiles, get_active_sessions
 from utils.frontend.all import (
     add_text,
     formatted,
+    prefetch_chat_histories,
     reset_session_state,
     security_check,
     setup_page,
@@ -35,7 +36,8 @@ def render_students_page():
     active_session_map = {}
     if active_sessions_success and active_sessions:
         for session in active_sessions:
-            active_session_map[session["student_name"]] = session["chat_session_id"]
+            active_session_map[session["student_name"]] = session
+        prefetch_chat_histories(active_sessions=active_sessions)
 
     cols = st.columns([0.9,10,1.1], gap="small")
     with cols[0]:
@@ -83,10 +85,13 @@ def render_students_page():
                             get_active_sessions.clear()
                             st.session_state["student_choice"] = student
                             if has_active_session:
+                                active_session = active_session_map[student_name]
                                 st.session_state["active_chat_session"] = {
-                                    "id": active_session_map[student_name],
+                                    "id": active_session["chat_session_id"],
                                     "chat_history": [],
-                                    "next_questions": [],
+                                    "next_questions": active_session.get("next_questions"),
+                                    "latest_turn": active_session.get("latest_turn"),
+                                    "history_summary": active_session.get("history_summary", ""),
                                     "recent_questions": [],
                                     "chat_start_timestamp": get_current_datetime(),
                                     "chat_end_timestamp": None,
@@ -5,11 +5,30 @@ import os
 from datetime import datetime, timezone
 from botocore.exceptions import ClientError
 from boto3.dynamodb.conditions import Key, Attr
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 
 # Environment variables
 CHAT_SESSIONS_TABLE_NAME = os.environ['CHAT_SESSIONS_TABLE_NAME']
 
+# Whether the resume snapshot stored on the session item is that of its latest turn, i.e. no message was added since it was stored.
+def is_snapshot_current(session: Dict) -> bool:
+    return session.get('snapshot_message_count') == session.get('message_count')
+
+# Suggested next questions of the latest turn, stored on the session item as its resume snapshot.
+# They are only returned when the snapshot is current, otherwise the chat page generates new ones.
+def get_snapshot_next_questions(session: Dict) -> Optional[List[str]]:
+    next_questions = session.get('next_questions')
+    if not next_questions or not is_snapshot_current(session):
+        return None
+    return list(next_questions)
+
+# Latest turn (question and answer) stored with the resume snapshot, shown by a resumed chat while its history loads.
+def get_snapshot_latest_turn(session: Dict) -> Optional[Dict[str, str]]:
+    latest_turn = session.get('latest_turn')
+    if not latest_turn or not is_snapshot_current(session):
+        return None
+    return {'question': latest_turn.get('question', ''), 'answer': latest_turn.get('answer', '')}
+
 def get_active_chat_sessions(user_email: str, login_session_id: str) -> Tuple[bool, str, bool, List[Dict]]:
     success = False
     message = ""
@@ -34,7 +53,10 @@ def get_active_chat_sessions(user_email: str, login_session_id: str) -> Tuple[bo
                     "chat_session_id": session.get('chat_session_id'),
                     "global_session_id": session.get('global_session_id'),
                     "started_at": session.get('started_at'),
-                    "last_updated_at": session.get('last_updated_at')
+                    "last_updated_at": session.get('last_updated_at'),
+                    "next_questions": get_snapshot_next_questions(session),
+                    "latest_turn": get_snapshot_latest_turn(session),
+                    "history_summary": session.get('history_summary', '')
                 }
                 for session in sessions
             ]
@@ -142,7 +164,10 @@ def lambda_handler(event, context):
                 "chat_session_id": session["chat_session_id"],
                 "global_session_id": session["global_session_id"],
                 "started_at": session["started_at"],
-                "last_updated_at": session["last_updated_at"]
+                "last_updated_at": session["last_updated_at"],
+                "next_questions": session["next_questions"],
+                "latest_turn": session["latest_turn"],
+                "history_summary": session["history_summary"]
             } for session in sessions
         ]
         
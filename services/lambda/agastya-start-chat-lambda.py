@@ -66,10 +66,16 @@ def formatted(text: str) -> str:
     return text.replace('-', ' ').title()
 
 def initialize_chat_session(user_email: str, login_session_id: str, chat_session_id: str, 
-                          user_first_name: str, user_last_name: str, student_name: str) -> Tuple[bool, str]:
-    """Initialize a new chat session in DynamoDB."""
+                          user_first_name: str, user_last_name: str, student_name: str,
+                          idempotency_key: Optional[str] = None) -> Tuple[bool, str, Optional[dict]]:
+    """Initialize a new chat session in DynamoDB and return its session item.
+
+    The session is only written if it does not exist yet. A retry carrying the idempotency key of the request
+    that created the session succeeds and returns the existing session item instead of writing it again.
+    """
     success = False
     message = ""
+    session = None
     
     try:
         dynamodb = boto3.resource('dynamodb')
@@ -79,32 +85,118 @@ def initialize_chat_session(user_email: str, login_session_id: str, chat_session
         
         now = datetime.now(timezone.utc).isoformat()
         
+        session = {
+            'global_session_id': global_session_id,
+            'login_session_id': login_session_id,
+            'chat_session_id': chat_session_id,
+            'user_email': user_email,
+            'user_full_name': f"{user_first_name} {user_last_name}",
+            'student_name': student_name,
+            'session_status': 'active',
+            'started_at': now,
+            'last_updated_at': now,
+            'message_count': 0,
+            'idempotency_key': idempotency_key or ''
+        }
         table.put_item(
-            Item={
-                'global_session_id': global_session_id,
-                'login_session_id': login_session_id,
-                'chat_session_id': chat_session_id,
-                'user_email': user_email,
-                'user_full_name': f"{user_first_name} {user_last_name}",
-                'student_name': student_name,
-                'session_status': 'active',
-                'started_at': now,
-                'last_updated_at': now,
-                'message_count': 0
-            }
+            Item=session,
+            ConditionExpression="attribute_not_exists(global_session_id)"
         )
         
         success = True
         message = f"Chat session initialized successfully for email={user_email}"
         print(f"initialize_chat_session | {message}")
+    except ClientError as e:
+        session = None
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            item = table.get_item(Key={'global_session_id': global_session_id}, ConsistentRead=True).get('Item', {})
+            if idempotency_key and item.get('idempotency_key') == idempotency_key:
+                success = True
+                session = item
+                message = f"Chat session already initialized by this request for email={user_email}"
+            else:
+                message = f"Chat session already exists: global_session_id={global_session_id}"
+        else:
+            message = f"Error initializing chat session: {e}"
+        print(f"initialize_chat_session | {message}")
     except Exception as e:
+        session = None
         message = f"Error initializing chat session: {e}"
         print(f"initialize_chat_session | {message}")
     
-    return success, message
+    return success, message, session
+
+def claim_first_messages(login_session_id: str, chat_session_id: str) -> Tuple[bool, str, bool]:
+    """Claim the insertion of the first messages of a chat session.
+
+    message_count is moved from 0 to 1 with a conditional update, so that of several attempts of the same request
+    (e.g. a retry sent after an API Gateway timeout while the first attempt is still running) exactly one inserts the
+    first messages. The third value tells whether this attempt won the claim.
+    """
+    success = False
+    message = ""
+    claimed = False
+
+    try:
+        dynamodb = boto3.resource('dynamodb')
+        chat_sessions_table = dynamodb.Table(CHAT_SESSIONS_TABLE_NAME)
+
+        global_session_id = f"{login_session_id}#{chat_session_id}"
+
+        chat_sessions_table.update_item(
+            Key={'global_session_id': global_session_id},
+            UpdateExpression="SET message_count = :claimed",
+            ConditionExpression="message_count = :empty",
+            ExpressionAttributeValues={
+                ':claimed': 1,
+                ':empty': 0
+            }
+        )
+
+        success = True
+        claimed = True
+        message = "First messages claimed"
+        print(f"claim_first_messages | {message}")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            success = True
+            message = "First messages already inserted by a previous attempt"
+        else:
+            message = f"Error claiming first messages: {e}"
+        print(f"claim_first_messages | {message}")
+    except Exception as e:
+        message = f"Error claiming first messages: {e}"
+        print(f"claim_first_messages | {message}")
+
+    return success, message, claimed
+
+def release_first_messages(login_session_id: str, chat_session_id: str) -> None:
+    """Release a claim taken by claim_first_messages whose insert failed, so that a retry inserts the first messages."""
+    try:
+        dynamodb = boto3.resource('dynamodb')
+        chat_sessions_table = dynamodb.Table(CHAT_SESSIONS_TABLE_NAME)
+
+        chat_sessions_table.update_item(
+            Key={'global_session_id': f"{login_session_id}#{chat_session_id}"},
+            UpdateExpression="SET message_count = :empty",
+            ConditionExpression="message_count = :claimed",
+            ExpressionAttributeValues={
+                ':claimed': 1,
+                ':empty': 0
+            }
+        )
+        print("release_first_messages | First messages claim released")
+    except Exception as e:
+        print(f"release_first_messages | Error releasing first messages claim: {e}")
 
 def insert_chat_message(login_session_id: str, chat_session_id: str, user_input: str, 
-                       user_input_kannada: str | None, input_type: str, assistant_output: str) -> Tuple[bool, str]:
+                       user_input_kannada: str | None, input_type: str, assistant_output: str,
+                       message_count_increment: int = 2, message_time: Optional[datetime] = None) -> Tuple[bool, str]:
+    """Insert a user message and the assistant's answer and count them on the session item.
+
+    The sort keys of the messages are derived from message_time (now by default). Given a fixed message_time,
+    a retry overwrites the messages of a failed attempt instead of adding them again.
+    """
     success = False
     message = ""
 
@@ -121,7 +213,7 @@ def insert_chat_message(login_session_id: str, chat_session_id: str, user_input:
         
         global_session_id = f"{login_session_id}#{chat_session_id}"
         
-        now = datetime.now(timezone.utc)
+        now = message_time or datetime.now(timezone.utc)
         
         # Insert user message
         user_timestamp = now.isoformat()
@@ -174,7 +266,7 @@ def insert_chat_message(login_session_id: str, chat_session_id: str, user_input:
             Key={'global_session_id': global_session_id},
             UpdateExpression="SET message_count = message_count + :inc, last_updated_at = :time",
             ExpressionAttributeValues={
-                ':inc': 2,
+                ':inc': message_count_increment,
                 ':time': assistant_timestamp
             }
         )
@@ -226,6 +318,8 @@ def lambda_handler(event, context):
         login_session_id = body.get('login_session_id', '').strip()
         chat_session_id = body.get('chat_session_id', '').strip()
         student_name = body.get('student_name', '').strip()
+        request_headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+        idempotency_key = (request_headers.get('idempotency-key') or '').strip() or None
         
         # Validate required fields
         if not user_first_name:
@@ -304,15 +398,29 @@ def lambda_handler(event, context):
         global_session_id = f"{login_session_id}#{chat_session_id}"
         
         # Initialize chat session
-        init_chat_success, init_chat_message = initialize_chat_session(
+        init_chat_success, init_chat_message, chat_session = initialize_chat_session(
             user_email=user_email,
             login_session_id=login_session_id,
             chat_session_id=chat_session_id,
             user_first_name=user_first_name,
             user_last_name=user_last_name,
-            student_name=student_name
+            student_name=student_name,
+            idempotency_key=idempotency_key
         )
         
+        if not init_chat_success and "already exists" in init_chat_message:
+            print(f"Chat session already exists with another idempotency key | global_session_id={global_session_id}")
+            return {
+                'statusCode': 400,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'detail': 'Chat session already exists.'
+                })
+            }
+
         if not init_chat_success:
             print(f"Error initializing chat session in DynamoDB: {init_chat_message} | global_session_id={global_session_id}")
             return {
@@ -330,15 +438,31 @@ def lambda_handler(event, context):
         first_user_message = f"Hi {formatted(student_name).split()[0]}, I'm {user_full_name}, your instructor. I would like to chat with you."
         first_assistant_message = f"Hi, I'm {formatted(student_name).split()[0]} from Agastya International Foundation. What would you like to know about me?"
     
-        # Insert first messages
-        insert_chat_message_success, insert_chat_message_message = insert_chat_message(
+        # Insert first messages, unless another attempt of this request already claimed them
+        claim_success, claim_message, claimed = claim_first_messages(
             login_session_id=login_session_id,
-            chat_session_id=chat_session_id,
-            user_input=first_user_message,
-            user_input_kannada=None,
-            input_type="system",
-            assistant_output=first_assistant_message
+            chat_session_id=chat_session_id
         )
+
+        if not claim_success:
+            insert_chat_message_success, insert_chat_message_message = False, claim_message
+        elif not claimed:
+            insert_chat_message_success, insert_chat_message_message = True, claim_message
+        else:
+            # The claim already counted one of the two first messages.
+            insert_chat_message_success, insert_chat_message_message = insert_chat_message(
+                login_session_id=login_session_id,
+                chat_session_id=chat_session_id,
+                user_input=first_user_message,
+                user_input_kannada=None,
+                input_type="system",
+                assistant_output=first_assistant_message,
+                message_count_increment=1,
+                # Timestamped at the session start, so that a retry after a failed insert overwrites its messages.
+                message_time=datetime.fromisoformat(chat_session['started_at'])
+            )
+            if not insert_chat_message_success:
+                release_first_messages(login_session_id=login_session_id, chat_session_id=chat_session_id)
         
         if not insert_chat_message_success:
             print(f"Error inserting chat history: {insert_chat_message_message} | global_session_id={global_session_id}")
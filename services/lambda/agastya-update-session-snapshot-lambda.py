@@ -0,0 +1,204 @@
+import boto3
+import json
+import os
+
+from datetime import datetime, timezone
+from botocore.exceptions import ClientError
+from typing import Dict, List, Optional, Tuple
+
+# Environment variables
+CHAT_SESSIONS_TABLE_NAME = os.environ['CHAT_SESSIONS_TABLE_NAME']
+
+# Store the suggested next questions of the latest turn on the session item as its resume snapshot, with the message count
+# they were generated at and the latest turn itself (question and answer), which a resumed chat shows while its history loads.
+# A snapshot of an earlier turn never overwrites the snapshot of a later one.
+def update_session_snapshot(login_session_id: str, chat_session_id: str, next_questions: List[str], message_count: int,
+                            latest_turn: Optional[Dict[str, str]] = None) -> Tuple[bool, str]:
+    success = False
+    message = ""
+    global_session_id = f"{login_session_id}#{chat_session_id}"
+
+    try:
+        dynamodb = boto3.resource('dynamodb')
+        chat_sessions_table = dynamodb.Table(CHAT_SESSIONS_TABLE_NAME)
+
+        chat_sessions_table.update_item(
+            Key={'global_session_id': global_session_id},
+            UpdateExpression="SET next_questions = :questions, snapshot_message_count = :count, latest_turn = :turn",
+            ConditionExpression="attribute_exists(global_session_id) AND (attribute_not_exists(snapshot_message_count) OR snapshot_message_count <= :count)",
+            ExpressionAttributeValues={
+                ':questions': next_questions,
+                ':count': message_count,
+                ':turn': latest_turn
+            }
+        )
+
+        success = True
+        message = f"Snapshot updated at {message_count} messages for global_session_id={global_session_id}"
+        print(f"update_session_snapshot | {message}")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            success = True
+            message = f"Snapshot of a later turn already stored, or no session for global_session_id={global_session_id}"
+            print(f"update_session_snapshot | {message}")
+        else:
+            message = f"Error updating snapshot for global_session_id={global_session_id}: {e}"
+            print(f"update_session_snapshot | {message}")
+    except Exception as e:
+        message = f"Unexpected error updating snapshot for global_session_id={global_session_id}: {e}"
+        print(f"update_session_snapshot | {message}")
+
+    return success, message
+
+def lambda_handler(event, context):
+    print(f"Event: {json.dumps(event)}")
+
+    try:
+        # Parse request body
+        if 'body' in event and event['body'] is not None:
+            try:
+                body = json.loads(event['body'])
+            except json.JSONDecodeError:
+                return {
+                    'statusCode': 422,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*'
+                    },
+                    'body': json.dumps({
+                        'detail': 'Invalid JSON in request body'
+                    })
+                }
+        else:
+            return {
+                'statusCode': 422,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'detail': 'Request body is required'
+                })
+            }
+
+        # Get parameters from request
+        login_session_id = body.get('login_session_id')
+        chat_session_id = body.get('chat_session_id')
+        next_questions = body.get('next_questions')
+        message_count = body.get('message_count')
+        latest_turn = body.get('latest_turn')
+
+        print(f"login_session_id: {login_session_id}, chat_session_id: {chat_session_id}, message_count: {message_count}")
+
+        # Validate required fields
+        if not login_session_id or not login_session_id.strip():
+            return {
+                'statusCode': 422,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'detail': 'login_session_id is required and cannot be empty'
+                })
+            }
+
+        if not chat_session_id or not chat_session_id.strip():
+            return {
+                'statusCode': 422,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'detail': 'chat_session_id is required and cannot be empty'
+                })
+            }
+
+        if not isinstance(next_questions, list) or not all(isinstance(question, str) for question in next_questions):
+            return {
+                'statusCode': 422,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'detail': 'next_questions must be a list of strings'
+                })
+            }
+
+        if not isinstance(message_count, int) or isinstance(message_count, bool) or message_count < 1:
+            return {
+                'statusCode': 422,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'detail': 'message_count must be a positive integer'
+                })
+            }
+
+        if latest_turn is not None and (not isinstance(latest_turn, dict) or not all(isinstance(latest_turn.get(key), str) for key in ('question', 'answer'))):
+            return {
+                'statusCode': 422,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'detail': 'latest_turn must be an object with a question and an answer string'
+                })
+            }
+
+        # Call the function
+        update_snapshot_success, update_snapshot_message = update_session_snapshot(
+            login_session_id=login_session_id.strip(),
+            chat_session_id=chat_session_id.strip(),
+            next_questions=next_questions,
+            message_count=message_count,
+            latest_turn={'question': latest_turn['question'], 'answer': latest_turn['answer']} if latest_turn else None
+        )
+
+        # Check for database errors
+        if not update_snapshot_success:
+            print(f"Database error in updating session snapshot: {update_snapshot_message} | login_session_id={login_session_id} | chat_session_id={chat_session_id}")
+            return {
+                'statusCode': 500,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': json.dumps({
+                    'detail': 'Failed to update the session snapshot in the database.'
+                })
+            }
+
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'success': True,
+                'message': update_snapshot_message,
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            })
+        }
+
+    except Exception as e:
+        print(f"Update session snapshot endpoint error: {str(e)} | login_session_id={login_session_id if 'login_session_id' in locals() else 'unknown'} | chat_session_id={chat_session_id if 'chat_session_id' in locals() else 'unknown'}")
+        import traceback
+        print(f"Traceback: {traceback.format_exc()}")
+
+        return {
+            'statusCode': 500,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({
+                'detail': 'Failed to update the session snapshot. Please try again.'
+            })
+        }
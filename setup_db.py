@@ -1,40 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
 from utils.backend.all import create_chat_message_table, create_chat_session_table, create_student_table, populate_student_table
 from utils.shared.logger import backend_logger
 
-# Function to initialize all required DynamoDB tables (students, chat messages, chat sessions) and populate the student table.
-def initialize_all_databases() -> tuple[bool, str]:
-    success = False
-    message = ""
-
-    create_student_table_success, create_student_table_message = create_student_table()
+# Function to create the student table and populate it as soon as it is ready.
+def create_and_populate_student_table() -> tuple[bool, str]:
+    create_student_table_success, _, create_student_table_message = create_student_table()
     if not create_student_table_success:
         message = f"Failed to create DynamoDB tables: {create_student_table_message}"
         backend_logger.error(f"initialize_all_databases | {message}")
-        return success, message
-    
+        return False, message
+
     populate_student_table_success, populate_student_table_message = populate_student_table()
     if not populate_student_table_success:
         message = f"Failed to populate student profiles: {populate_student_table_message}"
         backend_logger.error(f"initialize_all_databases | {populate_student_table_message}")
+        return False, message
+
+    return True, populate_student_table_message
+
+# Function to initialize all required DynamoDB tables (students, chat messages, chat sessions) and populate the student table.
+# Table creation and the table_exists waiters run concurrently; the student table is populated as soon as it exists.
+def initialize_all_databases() -> tuple[bool, str]:
+    success = False
+    message = ""
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        student_table_future = executor.submit(create_and_populate_student_table)
+        chat_message_table_future = executor.submit(create_chat_message_table)
+        chat_session_table_future = executor.submit(create_chat_session_table)
+
+        student_table_success, student_table_message = student_table_future.result()
+        create_chat_message_table_success, create_chat_message_table_message = chat_message_table_future.result()
+        create_chat_session_table_success, create_chat_session_table_message = chat_session_table_future.result()
+
+    if not student_table_success:
+        message = student_table_message
         return success, message
-    
-    create_chat_message_table_success, create_chat_message_table_message = create_chat_message_table()
+
     if not create_chat_message_table_success:
         message = f"Failed to create chat message table: {create_chat_message_table_message}"
         backend_logger.error(f"initialize_all_databases | {message}")
         return success, message
-    
-    create_chat_session_table_success, create_chat_session_table_message = create_chat_session_table()
+
     if not create_chat_session_table_success:
         message = f"Failed to create chat session table: {create_chat_session_table_message}"
         backend_logger.error(f"initialize_all_databases | {message}")
         return success, message
-    
+
     return True, "Database initialization completed successfully"
-    
+
 if __name__ == "__main__":
     success, message = initialize_all_databases()
     if success:
         backend_logger.info("All databases have been initialized successfully")
     else:
-        backend_logger.error(f"Database initialization failed: {message}")
\ No newline at end of file
+        backend_logger.error(f"Database initialization failed: {message}")
@@ -1,8 +1,11 @@
 import boto3
 import json
+import os
+import threading
 
 from config.backend.aws import (
     AWS_ACCESS_KEY_ID,
+    AWS_MAX_POOL_CONNECTIONS,
     AWS_REGION,
     AWS_SECRET_ACCESS_KEY
 )
@@ -21,18 +24,70 @@ from config.backend.s3 import (
     STUDENT_VECTORSTORE_FOLDER_PATH
 )
 from boto3.dynamodb.conditions import Key
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from datetime import datetime, timedelta, timezone
 from utils.shared.logger import backend_logger
+from utils.shared.translate import translate_text
 from typing import Dict, List, Optional, Tuple
 
-# Function to get a boto3 DynamoDB resource object.
+# Process-level cache of boto3 objects. Clients are thread-safe and shared by every thread,
+# resources are not, so each thread keeps its own resource and memoized table handles.
+_aws_lock = threading.Lock()
+_aws_pid = None
+_aws_session = None
+_aws_clients = {}
+_aws_thread_local = threading.local()
+
+# Function to get the shared boto3 session, recreating the cache after a fork.
+def _get_aws_session() -> boto3.session.Session:
+    global _aws_pid, _aws_session, _aws_clients, _aws_thread_local
+    if _aws_pid != os.getpid():
+        _aws_pid = os.getpid()
+        _aws_session = boto3.session.Session(
+            region_name=AWS_REGION,
+            aws_access_key_id=AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+        )
+        _aws_clients = {}
+        _aws_thread_local = threading.local()
+    return _aws_session
+
+# Function to get the botocore configuration shared by every cached client and resource.
+def get_aws_config() -> Config:
+    return Config(max_pool_connections=AWS_MAX_POOL_CONNECTIONS)
+
+# Function to get a cached, thread-safe boto3 client for the given service.
+def get_aws_client(service_name: str):
+    with _aws_lock:
+        session = _get_aws_session()
+        client = _aws_clients.get(service_name)
+        if client is None:
+            client = session.client(service_name, config=get_aws_config())
+            _aws_clients[service_name] = client
+    return client
+
+# Function to get a boto3 DynamoDB resource object cached for the calling thread.
 def get_dynamodb_resource():
-    return boto3.resource(
-        'dynamodb', 
-        region_name=AWS_REGION,
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-    )
+    with _aws_lock:
+        session = _get_aws_session()
+        thread_cache = _aws_thread_local
+        resource = getattr(thread_cache, "dynamodb_resource", None)
+        if resource is None:
+            resource = session.resource('dynamodb', config=get_aws_config())
+            thread_cache.dynamodb_resource = resource
+            thread_cache.dynamodb_tables = {}
+    return resource
+
+# Function to get a memoized DynamoDB table handle for the calling thread.
+def get_dynamodb_table(table_name: str):
+    dynamodb = get_dynamodb_resource()
+    tables = _aws_thread_local.dynamodb_tables
+    table = tables.get(table_name)
+    if table is None:
+        table = dynamodb.Table(table_name)
+        tables[table_name] = table
+    return table
 
 # Function to create the DynamoDB table for storing student profiles if it doesn't exist.
 def create_student_table() -> tuple[bool, bool, str]:
@@ -68,8 +123,7 @@ def create_student_table() -> tuple[bool, bool, str]:
 
 # Function to get the DynamoDB student table object.
 def get_student_table():
-    dynamodb = get_dynamodb_resource()
-    return dynamodb.Table(DYNAMODB_STUDENT_TABLE_NAME)
+    return get_dynamodb_table(DYNAMODB_STUDENT_TABLE_NAME)
 
 # Function to load student metadata from an Excel file stored in S3.
 def load_student_metadata_from_s3() -> Tuple[bool, str, Optional[List[Dict]]]:
@@ -78,7 +132,7 @@ def load_student_metadata_from_s3() -> Tuple[bool, str, Optional[List[Dict]]]:
     data = None
     
     try:
-        s3_client = boto3.client('s3', region_name=AWS_REGION)
+        s3_client = get_aws_client('s3')
         
         s3_key = f"{STUDENT_METADATA_FOLDER_PATH}/{STUDENT_METADATA_FILE_NAME}"
         
@@ -312,5 +366,173 @@ def create_chat_session_table() -> Tuple[bool, str]:
     
     return success, message
 
+# Function to get the chat session item of a global session id.
+def get_chat_session(global_session_id: str) -> Tuple[bool, str, bool, Dict]:
+    success = False
+    message = ""
+    result = False
+    data = {}
+
+    try:
+        chat_sessions_table = get_dynamodb_table(DYNAMODB_CHAT_SESSIONS_TABLE_NAME)
+
+        response = chat_sessions_table.get_item(Key={'global_session_id': global_session_id})
+
+        success = True
+        if 'Item' in response:
+            result = True
+            data = response['Item']
+            message = f"Chat session found for global_session_id={global_session_id}"
+        else:
+            message = f"Chat session not found for global_session_id={global_session_id}"
+        backend_logger.info(f"get_chat_session | {message}")
+    except Exception as e:
+        message = f"Error getting chat session for global_session_id={global_session_id}: {e}"
+        backend_logger.error(f"get_chat_session | {message}")
+
+    return success, message, result, data
+
+# Function to store the rolling summary of the older turns of a chat session and how many messages it covers.
+# The update only moves the summary forward, so a slower concurrent fold never overwrites a more recent one.
+def update_chat_session_history_summary(global_session_id: str, history_summary: str, summarized_message_count: int) -> Tuple[bool, str]:
+    success = False
+    message = ""
+
+    try:
+        chat_sessions_table = get_dynamodb_table(DYNAMODB_CHAT_SESSIONS_TABLE_NAME)
+
+        chat_sessions_table.update_item(
+            Key={'global_session_id': global_session_id},
+            UpdateExpression="SET history_summary = :summary, summarized_message_count = :count",
+            ConditionExpression="attribute_exists(global_session_id) AND (attribute_not_exists(summarized_message_count) OR summarized_message_count < :count)",
+            ExpressionAttributeValues={
+                ':summary': history_summary,
+                ':count': summarized_message_count
+            }
+        )
+
+        success = True
+        message = f"History summary updated to cover {summarized_message_count} messages for global_session_id={global_session_id}"
+        backend_logger.info(f"update_chat_session_history_summary | {message}")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            success = True
+            message = f"History summary already covers {summarized_message_count} or more messages for global_session_id={global_session_id}"
+            backend_logger.info(f"update_chat_session_history_summary | {message}")
+        else:
+            message = f"Error updating history summary for global_session_id={global_session_id}: {e}"
+            backend_logger.error(f"update_chat_session_history_summary | {message}")
+    except Exception as e:
+        message = f"Unexpected error updating history summary for global_session_id={global_session_id}: {e}"
+        backend_logger.error(f"update_chat_session_history_summary | {message}")
+
+    return success, message
+
+# Function to get the full chat history of a session from the chat messages table, oldest first.
+def get_chat_history(global_session_id: str) -> Tuple[bool, str, bool, List[Dict]]:
+    success = False
+    message = ""
+    result = False
+    data = []
+
+    try:
+        chat_messages_table = get_dynamodb_table(DYNAMODB_CHAT_MESSAGES_TABLE_NAME)
+
+        query_kwargs = {
+            'KeyConditionExpression': Key('global_session_id').eq(global_session_id),
+            'ScanIndexForward': True
+        }
+        while True:
+            response = chat_messages_table.query(**query_kwargs)
+            for item in response.get('Items', []):
+                data.append({
+                    "role": item.get('role'),
+                    "content": item.get('message', ''),
+                    "content_kannada": item.get('message_kannada', ''),
+                    "input_type": item.get('input_type'),
+                    "created_at": item.get('created_at')
+                })
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        success = True
+        result = len(data) > 0
+        message = f"Retrieved {len(data)} messages for global_session_id={global_session_id}"
+        backend_logger.info(f"get_chat_history | {message}")
+    except Exception as e:
+        message = f"Error getting chat history for global_session_id={global_session_id}: {e}"
+        backend_logger.error(f"get_chat_history | {message}")
+
+    return success, message, result, data
+
+# Function to insert a user message and the assistant's answer into the chat messages table and update the session's message count.
+# Returns the inserted messages in the format of get_chat_history.
+def insert_chat_message(global_session_id: str, user_input: str, user_input_kannada: Optional[str], input_type: str, assistant_output: str) -> Tuple[bool, str, List[Dict]]:
+    success = False
+    message = ""
+    data = []
+
+    valid_input_types = ['manual-english', 'manual-kannada', 'button', 'default', 'system']
+    if input_type not in valid_input_types:
+        message = f"Invalid input_type: '{input_type}'. Must be one of: {', '.join(valid_input_types)}"
+        backend_logger.error(f"insert_chat_message | {message}")
+        return success, message, data
+
+    try:
+        chat_messages_table = get_dynamodb_table(DYNAMODB_CHAT_MESSAGES_TABLE_NAME)
+        chat_sessions_table = get_dynamodb_table(DYNAMODB_CHAT_SESSIONS_TABLE_NAME)
+
+        now = datetime.now(timezone.utc)
+        user_timestamp = now.isoformat()
+        assistant_timestamp = (now + timedelta(milliseconds=100)).isoformat()
+
+        user_message = {
+            "role": "user",
+            "content": user_input,
+            "content_kannada": user_input_kannada if user_input_kannada else translate_text(text=user_input, source_language="en", target_language="kn"),
+            "input_type": input_type,
+            "created_at": user_timestamp
+        }
+        assistant_message = {
+            "role": "assistant",
+            "content": assistant_output,
+            "content_kannada": translate_text(text=assistant_output, source_language="en", target_language="kn"),
+            "input_type": "default",
+            "created_at": assistant_timestamp
+        }
+
+        for chat_message in (user_message, assistant_message):
+            chat_messages_table.put_item(
+                Item={
+                    'global_session_id': global_session_id,
+                    'message_timestamp': f"{chat_message['created_at']}#{chat_message['role']}",
+                    'role': chat_message['role'],
+                    'message': chat_message['content'],
+                    'message_kannada': chat_message['content_kannada'],
+                    'input_type': chat_message['input_type'],
+                    'created_at': chat_message['created_at']
+                }
+            )
+
+        chat_sessions_table.update_item(
+            Key={'global_session_id': global_session_id},
+            UpdateExpression="SET message_count = message_count + :inc, last_updated_at = :time",
+            ExpressionAttributeValues={
+                ':inc': 2,
+                ':time': assistant_timestamp
+            }
+        )
+
+        success = True
+        data = [user_message, assistant_message]
+        message = f"Chat history inserted successfully for global_session_id={global_session_id}"
+        backend_logger.info(f"insert_chat_message | {message}")
+    except Exception as e:
+        message = f"Error inserting chat history for global_session_id={global_session_id}: {e}"
+        backend_logger.error(f"insert_chat_message | {message}")
+
+    return success, message, data
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
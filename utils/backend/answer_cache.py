@@ -0,0 +1,102 @@
+import hashlib
+import random
+import re
+import threading
+
+from collections import OrderedDict
+from config.backend.llm import (
+    FIRST_TURN_ANSWER_CACHE_SIZE,
+    FIRST_TURN_ANSWER_VARIANTS,
+    RESPONSE_GENERATION_MODEL_ID,
+    RESPONSE_GENERATION_MODEL_TEMPERATURE
+)
+from prompts.backend import SYSTEM_PROMPT_MAIN_PREFIX, SYSTEM_PROMPT_MAIN_SUFFIX
+from utils.backend.chat import has_previous_user_turns
+from utils.backend.retrieval import normalize_question
+from utils.shared.logger import backend_logger
+from utils.shared.metrics import get_metric_rate, increment_metric
+from typing import Dict, List, Optional, Tuple
+
+# Placeholder stored in cached answers in place of the instructor's name, so an answer can be served to any instructor.
+# Cached answers are str.format templates: braces of the answer itself are escaped, so only this placeholder is substituted.
+USER_FULL_NAME_PLACEHOLDER = "{user_full_name}"
+
+# Version of the prompt and model that produced an answer; answers of another version are never served.
+FIRST_TURN_ANSWER_VERSION = hashlib.sha256(
+    f"{RESPONSE_GENERATION_MODEL_ID}:{RESPONSE_GENERATION_MODEL_TEMPERATURE}\n{SYSTEM_PROMPT_MAIN_PREFIX}\n{SYSTEM_PROMPT_MAIN_SUFFIX}".encode('utf-8')
+).hexdigest()[:16]
+
+# Answer variants keyed by (student_name, store version, normalized question, prompt/model version), least recently used first.
+# Each entry holds the distinct answers collected so far ("variants") and how many answers were stored in total ("samples").
+_first_turn_answers: "OrderedDict[Tuple[str, Optional[int], str, str], Dict]" = OrderedDict()
+_first_turn_answers_lock = threading.Lock()
+
+# Function to check whether a turn is a first turn, i.e. its history holds only the system greeting.
+def is_first_turn(chat_history: List[Dict]) -> bool:
+    return not has_previous_user_turns(chat_history)
+
+def get_first_turn_answer_key(student_name: str, store_version: Optional[int], question: str) -> Tuple[str, Optional[int], str, str]:
+    return (student_name, store_version, normalize_question(question), FIRST_TURN_ANSWER_VERSION)
+
+# Function to get a cached answer to a first-turn question, sampled at random among its variants.
+# Answers are served as soon as one is stored, with a probability of samples / FIRST_TURN_ANSWER_VARIANTS while the entry fills up:
+# a miss lets the caller generate and store another sample. Identical answers count as samples too, so the cache also fills
+# (and then always serves) when the model answers deterministically.
+def get_first_turn_answer(student_name: str, store_version: Optional[int], question: str, user_full_name: str) -> Optional[str]:
+    if not FIRST_TURN_ANSWER_CACHE_SIZE:
+        return None
+    key = get_first_turn_answer_key(student_name, store_version, question)
+    increment_metric("first_turn_answer_cache.total")
+    with _first_turn_answers_lock:
+        entry = _first_turn_answers.get(key)
+        if entry is None or random.random() >= entry["samples"] / FIRST_TURN_ANSWER_VARIANTS:
+            return None
+        _first_turn_answers.move_to_end(key)
+        answer = random.choice(entry["variants"])
+
+    increment_metric("first_turn_answer_cache.hits")
+    backend_logger.info(
+        f"get_first_turn_answer | Served cached first-turn answer for student: {student_name} "
+        f"| hit rate: {get_metric_rate('first_turn_answer_cache.hits', 'first_turn_answer_cache.total'):.2%}"
+    )
+    return answer.format(user_full_name=user_full_name)
+
+def escape_braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+# Function to turn an answer into a template servable to any instructor: the instructor's full name is replaced by the placeholder.
+# Returns None when the answer still mentions part of the name (e.g. only the first name), which no placeholder could stand for.
+def get_first_turn_answer_template(answer: str, user_full_name: str) -> Optional[str]:
+    template = escape_braces(answer)
+    if user_full_name.strip():
+        template = template.replace(escape_braces(user_full_name.strip()), USER_FULL_NAME_PLACEHOLDER)
+    for name_token in re.findall(r"\w+", user_full_name):
+        if len(name_token) > 1 and re.search(rf"\b{re.escape(name_token)}\b", template, re.IGNORECASE):
+            return None
+    return template
+
+# Function to add a generated answer to a first-turn question as one of its cached samples. Answers addressing the instructor
+# by part of their name are not cached. Answers of a student's previous store versions can no longer be served,
+# so they are dropped when a newer version is stored.
+def store_first_turn_answer(student_name: str, store_version: Optional[int], question: str, user_full_name: str, answer: str):
+    if not FIRST_TURN_ANSWER_CACHE_SIZE or not answer.strip():
+        return
+    key = get_first_turn_answer_key(student_name, store_version, question)
+    answer = get_first_turn_answer_template(answer, user_full_name)
+    if answer is None:
+        increment_metric("first_turn_answer_cache.personal")
+        backend_logger.info(f"store_first_turn_answer | Not caching a first-turn answer that mentions the instructor by name for student: {student_name}")
+        return
+    with _first_turn_answers_lock:
+        for stale_key in [stale_key for stale_key in _first_turn_answers if stale_key[0] == student_name and stale_key[1] != store_version]:
+            del _first_turn_answers[stale_key]
+        entry = _first_turn_answers.setdefault(key, {"variants": [], "samples": 0})
+        entry["samples"] = min(entry["samples"] + 1, FIRST_TURN_ANSWER_VARIANTS)
+        if answer not in entry["variants"] and len(entry["variants"]) < FIRST_TURN_ANSWER_VARIANTS:
+            entry["variants"].append(answer)
+        _first_turn_answers.move_to_end(key)
+        while len(_first_turn_answers) > FIRST_TURN_ANSWER_CACHE_SIZE:
+            _first_turn_answers.popitem(last=False)
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,196 @@
+import re
+
+from config.backend.llm import (
+    CONTEXTUALIZATION_MODEL_ID,
+    CONTEXTUALIZATION_MODEL_MAX_TOKENS,
+    PROMPT_CACHING_MIN_TOKENS,
+    RESPONSE_GENERATION_MODEL_ID,
+    RESPONSE_GENERATION_MODEL_MAX_TOKENS,
+    RESPONSE_GENERATION_MODEL_TEMPERATURE,
+    RESPONSE_GENERATION_PROMPT_CACHING
+)
+from langchain_aws import ChatBedrockConverse
+from langchain_aws.chat_models import ChatBedrock
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from prompts.backend import (
+    SYSTEM_PROMPT_CONTEXTUALIZED_QUESTION,
+    SYSTEM_PROMPT_MAIN_HISTORY_SUMMARY,
+    SYSTEM_PROMPT_MAIN_PREFIX,
+    SYSTEM_PROMPT_MAIN_SUFFIX
+)
+from utils.backend.all import get_aws_client
+from utils.backend.history import count_tokens
+from utils.shared.logger import backend_logger
+from utils.shared.metrics import get_metric_rate, increment_metric
+from typing import Dict, List, Optional, Tuple
+
+# Input types whose questions are already standalone: suggested-question buttons and the system greeting.
+STANDALONE_INPUT_TYPES = ("button", "system")
+
+# Pronouns and phrases that only make sense with the earlier turns. "you"/"your" address the student and are not anaphoric.
+ANAPHORA_PATTERN = re.compile(
+    r"\b(it|its|itself|they|them|their|theirs|he|him|his|she|her|hers|these|those|"
+    r"what about|how about|and you|why not|why so|how come|what else|anything else|the same|"
+    r"this one|that one|which one|you said|you mentioned|you told)\b",
+    re.IGNORECASE
+)
+
+# Words that are anaphoric in a short follow-up ("Tell me more about that", "Why was that?") but are ordinary words in a
+# full question ("What is one thing you like at Agastya?"), so they only count below SHORT_FOLLOW_UP_QUESTION_WORDS words.
+SHORT_FOLLOW_UP_PATTERN = re.compile(
+    r"\b(this|that|there|then|such|more|other|another|also|too|again|earlier|before|previous)\b",
+    re.IGNORECASE
+)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Questions shorter than this many words are usually elliptical follow-ups ("Why?", "Which one?").
+MIN_STANDALONE_QUESTION_WORDS = 4
+
+SHORT_FOLLOW_UP_QUESTION_WORDS = 8
+
+# Function to check whether a chat history has any instructor turn other than the system greeting.
+def has_previous_user_turns(chat_history: List[Dict]) -> bool:
+    return any(message.get("role") == "user" and message.get("input_type") != "system" for message in chat_history)
+
+# Function to decide locally whether a question must be rewritten with the chat history before retrieval.
+def needs_contextualization(question: str, input_type: str, chat_history: List[Dict]) -> Tuple[bool, str]:
+    if input_type in STANDALONE_INPUT_TYPES:
+        return False, f"input_type is '{input_type}'"
+    if not has_previous_user_turns(chat_history):
+        return False, "first turn"
+    if ANAPHORA_PATTERN.search(question):
+        return True, "references earlier turns"
+    word_count = len(WORD_PATTERN.findall(question))
+    if word_count < MIN_STANDALONE_QUESTION_WORDS:
+        return True, "elliptical question"
+    if word_count < SHORT_FOLLOW_UP_QUESTION_WORDS and SHORT_FOLLOW_UP_PATTERN.search(question):
+        return True, "short follow-up"
+    return False, "no references to earlier turns"
+
+# Function to rewrite a follow-up question into a standalone question using the chat history.
+async def contextualize_question(question: str, chat_history: List[Dict]) -> str:
+    llm = ChatBedrock(
+        model=CONTEXTUALIZATION_MODEL_ID,
+        temperature=0,
+        max_tokens=CONTEXTUALIZATION_MODEL_MAX_TOKENS
+    )
+    messages = [("system", SYSTEM_PROMPT_CONTEXTUALIZED_QUESTION)]
+    for message in chat_history:
+        messages.append(("human" if message.get("role") == "user" else "ai", message.get("content", "")))
+    messages.append(("human", question))
+    response = await llm.ainvoke(messages)
+    return response.content.strip() or question
+
+# Function to get the standalone question used for retrieval, skipping the rewrite LLM call when the question is already standalone.
+async def get_standalone_question(question: str, input_type: str, chat_history: List[Dict]) -> Tuple[bool, str, str]:
+    success = False
+    message = ""
+    data = question
+    try:
+        rewrite_needed, reason = needs_contextualization(question, input_type, chat_history)
+        increment_metric("contextualization.total")
+        if rewrite_needed:
+            data = await contextualize_question(question, chat_history)
+            increment_metric("contextualization.rewritten")
+        else:
+            increment_metric("contextualization.skipped")
+
+        success = True
+        message = f"{'Rewrote' if rewrite_needed else 'Skipped rewriting'} question ({reason}) | skip rate: {get_metric_rate('contextualization.skipped', 'contextualization.total'):.2%}"
+        backend_logger.info(f"get_standalone_question | {message}")
+    except Exception as e:
+        data = question
+        message = f"Error contextualizing question, falling back to the original question: {str(e)}"
+        backend_logger.error(f"get_standalone_question | {message}")
+    return success, message, data
+
+# Function to get the minimum prefix length, in tokens, for which Bedrock prompt caching is requested with a model.
+# Returns None when caching is disabled or not supported by the model.
+def get_prompt_caching_min_tokens(model_id: str) -> Optional[int]:
+    if not RESPONSE_GENERATION_PROMPT_CACHING:
+        return None
+    return next((min_tokens for model, min_tokens in PROMPT_CACHING_MIN_TOKENS.items() if model in model_id), None)
+
+# Function to build the messages of the main student response prompt.
+# The system message starts with the stable prefix (instructions and persona card), then the variable suffix (retrieved context
+# and summary of older turns); the recent chat history and the question come after it as conversation messages.
+# The instructions alone are below the minimum cacheable prefix of most models, so the prefix only reaches it with a persona card
+# (about 1,200 tokens with a full card). The cache point is only added when the prefix reaches prompt_caching_min_tokens,
+# since Bedrock ignores shorter ones. count_tokens overestimates English prose, so a prefix counted just above the limit may
+# still be ignored; that costs nothing but the saving.
+def build_student_response_messages(student_name: str, user_full_name: str, persona_card: str, context: str, history_summary: str, chat_history: List[Dict], question: str, prompt_caching_min_tokens: Optional[int]) -> List:
+    prefix = SYSTEM_PROMPT_MAIN_PREFIX.format(student_name=student_name, user_full_name=user_full_name, persona_card=persona_card)
+    suffix = SYSTEM_PROMPT_MAIN_SUFFIX.format(
+        context=context,
+        history_summary=SYSTEM_PROMPT_MAIN_HISTORY_SUMMARY.format(summary=history_summary) if history_summary else ""
+    )
+    system_content = [{"type": "text", "text": prefix}]
+    if prompt_caching_min_tokens is not None and count_tokens(prefix) >= prompt_caching_min_tokens:
+        system_content.append(ChatBedrockConverse.create_cache_point())
+    system_content.append({"type": "text", "text": suffix})
+
+    messages = [SystemMessage(content=system_content)]
+    for message in chat_history:
+        if message.get("role") == "user":
+            messages.append(HumanMessage(content=message.get("content", "")))
+        else:
+            messages.append(AIMessage(content=message.get("content", "")))
+    messages.append(HumanMessage(content=question))
+    return messages
+
+# Function to extract input, output and cached token counts from a model response.
+def get_token_usage(response) -> Dict[str, int]:
+    usage_metadata = getattr(response, "usage_metadata", None) or {}
+    input_token_details = usage_metadata.get("input_token_details", {}) or {}
+    return {
+        "input_tokens": usage_metadata.get("input_tokens", 0),
+        "output_tokens": usage_metadata.get("output_tokens", 0),
+        "cache_read_tokens": input_token_details.get("cache_read", 0),
+        "cache_write_tokens": input_token_details.get("cache_creation", 0)
+    }
+
+# Function to get the text of a model response whose content may be a string or a list of content blocks.
+def get_response_text(response) -> str:
+    if isinstance(response.content, str):
+        return response.content.strip()
+    return "".join(block.get("text", "") for block in response.content if isinstance(block, dict) and block.get("type") == "text").strip()
+
+# Function to generate the student's answer to the instructor's question and report the token usage, including cached prompt tokens.
+# chat_history and history_summary are the window returned by get_history_window.
+async def generate_student_response(student_name: str, user_full_name: str, persona_card: str, context: str, history_summary: str, chat_history: List[Dict], question: str) -> Tuple[bool, str, Dict]:
+    success = False
+    message = ""
+    data = {}
+    try:
+        prompt_caching_min_tokens = get_prompt_caching_min_tokens(RESPONSE_GENERATION_MODEL_ID)
+        llm = ChatBedrockConverse(
+            model=RESPONSE_GENERATION_MODEL_ID,
+            temperature=RESPONSE_GENERATION_MODEL_TEMPERATURE,
+            max_tokens=RESPONSE_GENERATION_MODEL_MAX_TOKENS,
+            client=get_aws_client('bedrock-runtime')
+        )
+        messages = build_student_response_messages(student_name, user_full_name, persona_card, context, history_summary, chat_history, question, prompt_caching_min_tokens)
+        response = await llm.ainvoke(messages)
+
+        usage = get_token_usage(response)
+        increment_metric("response_generation.requests")
+        increment_metric("response_generation.input_tokens", usage["input_tokens"])
+        increment_metric("response_generation.cache_read_tokens", usage["cache_read_tokens"])
+        increment_metric("response_generation.cache_write_tokens", usage["cache_write_tokens"])
+
+        success = True
+        data = {"answer": get_response_text(response), "usage": usage}
+        message = (
+            f"Generated response for student: {student_name} | input tokens: {usage['input_tokens']}, "
+            f"cached read: {usage['cache_read_tokens']}, cached write: {usage['cache_write_tokens']}, output tokens: {usage['output_tokens']}"
+            f"{'' if prompt_caching_min_tokens is not None else ' (prompt caching not supported for this model)'}"
+        )
+        backend_logger.info(f"generate_student_response | {message}")
+    except Exception as e:
+        message = f"Error generating response for student: {student_name}: {str(e)}"
+        backend_logger.error(f"generate_student_response | {message}")
+    return success, message, data
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+from config.backend.llm import (
+    SPECULATIVE_ANSWERS_COMMIT_WAIT_SECONDS,
+    SPECULATIVE_ANSWERS_ENABLED,
+    SPECULATIVE_ANSWERS_MAX_CONCURRENCY_PER_USER,
+    SPECULATIVE_ANSWERS_MAX_QUESTIONS,
+    SPECULATIVE_ANSWERS_TTL_SECONDS
+)
+from utils.backend.retrieval import normalize_question
+from utils.shared.logger import backend_logger
+from utils.shared.metrics import get_metric_rate, increment_metric
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Uncommitted answers to the suggested next questions of each chat session, generated in the background.
+# Drafts only live in process memory: a committed draft is inserted like any other turn, and unused drafts are dropped
+# without touching the chat messages table. A draft is only valid for the history it was generated from (its message_count).
+class DraftStore:
+    def __init__(self, max_concurrency_per_user: int = SPECULATIVE_ANSWERS_MAX_CONCURRENCY_PER_USER, ttl_seconds: int = SPECULATIVE_ANSWERS_TTL_SECONDS, commit_wait_seconds: int = SPECULATIVE_ANSWERS_COMMIT_WAIT_SECONDS):
+        self.max_concurrency_per_user = max_concurrency_per_user
+        self.ttl_seconds = ttl_seconds
+        self.commit_wait_seconds = commit_wait_seconds
+        self.sessions: Dict[str, Dict] = {}
+        self.user_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def get_user_semaphore(self, user_email: str) -> asyncio.Semaphore:
+        return self.user_semaphores.setdefault(user_email, asyncio.Semaphore(self.max_concurrency_per_user))
+
+    # Generate the draft of one question once the user's budget allows it.
+    async def speculate_one(self, global_session_id: str, session: Dict, user_email: str, question: str, answer_question: Callable[[str], Awaitable[Tuple[bool, str, str]]]):
+        try:
+            async with self.get_user_semaphore(user_email):
+                if self.sessions.get(global_session_id) is not session:
+                    return
+                success, message, answer = await answer_question(question)
+        except Exception as e:
+            success, message = False, f"Error speculating answer for global_session_id={global_session_id}: {str(e)}"
+        if not success:
+            backend_logger.error(f"DraftStore.speculate_one | {message}")
+            return
+        session["answers"][normalize_question(question)] = {"answer": answer, "created_at": time.monotonic()}
+        increment_metric("speculative_answers.generated")
+
+    # Start generating drafts for the suggested questions of a session, replacing any previous drafts of that session.
+    # answer_question runs the regular answer pipeline for one question without persisting anything.
+    def speculate(self, global_session_id: str, user_email: str, message_count: int, questions: List[str], answer_question: Callable[[str], Awaitable[Tuple[bool, str, str]]]) -> int:
+        self.discard(global_session_id)
+        self.discard_expired()
+        session = {"message_count": message_count, "answers": {}, "tasks": {}, "created_at": time.monotonic()}
+        self.sessions[global_session_id] = session
+        for question in questions[:SPECULATIVE_ANSWERS_MAX_QUESTIONS]:
+            key = normalize_question(question)
+            if key and key not in session["tasks"]:
+                session["tasks"][key] = asyncio.create_task(self.speculate_one(global_session_id, session, user_email, question, answer_question))
+        increment_metric("speculative_answers.requested", len(session["tasks"]))
+        backend_logger.info(f"DraftStore.speculate | Speculating {len(session['tasks'])} answers for global_session_id={global_session_id}")
+        return len(session["tasks"])
+
+    # Take the draft answering a question at the given history length, waiting up to commit_wait_seconds for it if it is still
+    # being generated; past that, None is returned and the caller generates the answer. Every other draft of the session is discarded.
+    async def commit(self, global_session_id: str, question: str, message_count: int) -> Optional[str]:
+        session = self.sessions.get(global_session_id)
+        key = normalize_question(question)
+        answer = None
+        if session is not None and session["message_count"] == message_count and time.monotonic() - session["created_at"] <= self.ttl_seconds:
+            task = session["tasks"].get(key)
+            if key not in session["answers"] and task is not None and not task.done():
+                _, pending = await asyncio.wait([task], timeout=self.commit_wait_seconds)
+                if pending:
+                    increment_metric("speculative_answers.commit_timeouts")
+                    backend_logger.warning(f"DraftStore.commit | Draft not ready after {self.commit_wait_seconds}s for global_session_id={global_session_id}, generating the answer")
+            draft = session["answers"].pop(key, None)
+            answer = draft["answer"] if draft else None
+
+        increment_metric("speculative_answers.commits")
+        increment_metric("speculative_answers.hits" if answer is not None else "speculative_answers.misses")
+        self.discard(global_session_id)
+        backend_logger.info(
+            f"DraftStore.commit | {'Committed' if answer is not None else 'No'} draft for global_session_id={global_session_id} "
+            f"| hit rate: {get_metric_rate('speculative_answers.hits', 'speculative_answers.commits'):.2%}"
+        )
+        return answer
+
+    # Drop the drafts of a session and cancel the ones still being generated.
+    def discard(self, global_session_id: str):
+        session = self.sessions.pop(global_session_id, None)
+        if session is None:
+            return
+        for task in session["tasks"].values():
+            if not task.done():
+                task.cancel()
+        increment_metric("speculative_answers.discarded", len(session["answers"]))
+
+    def discard_expired(self):
+        now = time.monotonic()
+        for global_session_id in [global_session_id for global_session_id, session in self.sessions.items() if now - session["created_at"] > self.ttl_seconds]:
+            self.discard(global_session_id)
+
+_draft_store: Optional[DraftStore] = None
+
+# Function to get the process-wide draft store. It is only used from the event loop of the backend, so it needs no lock.
+def get_draft_store() -> DraftStore:
+    global _draft_store
+    if _draft_store is None:
+        _draft_store = DraftStore()
+    return _draft_store
+
+# Function to start speculative answers for the suggested next questions of a session.
+def speculate_answers(global_session_id: str, user_email: str, message_count: int, questions: List[str], answer_question: Callable[[str], Awaitable[Tuple[bool, str, str]]]) -> Tuple[bool, str, int]:
+    if not SPECULATIVE_ANSWERS_ENABLED:
+        return True, "Speculative answers are disabled", 0
+    try:
+        count = get_draft_store().speculate(global_session_id, user_email, message_count, questions, answer_question)
+        return True, f"Speculating {count} answers for global_session_id={global_session_id}", count
+    except Exception as e:
+        message = f"Error starting speculative answers for global_session_id={global_session_id}: {str(e)}"
+        backend_logger.error(f"speculate_answers | {message}")
+        return False, message, 0
+
+# Function to get the committed draft answer of a button question, or None when the regular pipeline must answer it.
+async def commit_draft_answer(global_session_id: str, question: str, input_type: str, message_count: int) -> Optional[str]:
+    if not SPECULATIVE_ANSWERS_ENABLED:
+        return None
+    store = get_draft_store()
+    if input_type != "button":
+        store.discard(global_session_id)
+        return None
+    return await store.commit(global_session_id, question, message_count)
+
+if __name__ == "__main__":
+    pass
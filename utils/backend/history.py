@@ -0,0 +1,117 @@
+import re
+
+from config.backend.llm import (
+    CHAT_HISTORY_FOLD_RATIO,
+    CHAT_HISTORY_MAX_TOKENS,
+    CHAT_HISTORY_MIN_RECENT_MESSAGES,
+    CHAT_HISTORY_SUMMARY_MAX_TOKENS,
+    CHAT_HISTORY_SUMMARY_MODEL_ID
+)
+from langchain_aws.chat_models import ChatBedrock
+from prompts.backend import SYSTEM_PROMPT_HISTORY_SUMMARY
+from utils.backend.all import update_chat_session_history_summary
+from utils.shared.logger import backend_logger
+from utils.shared.metrics import increment_metric, set_metric
+from utils.shared.other import formatted
+from typing import Dict, List, Tuple
+
+# Subword pieces used to count tokens: words are split into pieces of at most four characters and every punctuation mark is a piece,
+# which tracks the BPE tokenizers of the response models closely enough for a budget without loading one.
+TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]", re.UNICODE)
+
+# Tokens added per message for the role and message framing.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Function to count the tokens of a text.
+def count_tokens(text: str) -> int:
+    return len(TOKEN_PATTERN.findall(text or ""))
+
+# Function to count the tokens of a list of chat messages, including the per-message framing.
+def count_message_tokens(messages: List[Dict]) -> int:
+    return sum(count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+# Function to split the messages not yet covered by the summary into the ones to fold into it and the recent ones kept verbatim.
+# Nothing is folded while the recent messages fit in CHAT_HISTORY_MAX_TOKENS; once they overflow, the oldest are folded until
+# the rest fit in CHAT_HISTORY_FOLD_RATIO of the budget, always keeping at least CHAT_HISTORY_MIN_RECENT_MESSAGES.
+def split_history_window(chat_history: List[Dict], summarized_message_count: int) -> Tuple[List[Dict], List[Dict]]:
+    recent = chat_history[summarized_message_count:]
+    if count_message_tokens(recent) <= CHAT_HISTORY_MAX_TOKENS:
+        return [], recent
+
+    target_tokens = CHAT_HISTORY_MAX_TOKENS * CHAT_HISTORY_FOLD_RATIO
+    message_tokens = [count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for message in recent]
+    total_tokens = sum(message_tokens)
+    fold_count = 0
+    while len(recent) - fold_count > CHAT_HISTORY_MIN_RECENT_MESSAGES and total_tokens > target_tokens:
+        total_tokens -= message_tokens[fold_count]
+        fold_count += 1
+    # Keep question and answer pairs together in the verbatim window.
+    if 0 < fold_count < len(recent) and recent[fold_count].get("role") != "user" and len(recent) - fold_count > CHAT_HISTORY_MIN_RECENT_MESSAGES:
+        fold_count += 1
+    return recent[:fold_count], recent[fold_count:]
+
+# Function to fold chat messages into the rolling summary of a conversation.
+async def summarize_history(student_name: str, user_full_name: str, summary: str, messages: List[Dict]) -> str:
+    llm = ChatBedrock(
+        model=CHAT_HISTORY_SUMMARY_MODEL_ID,
+        temperature=0,
+        max_tokens=CHAT_HISTORY_SUMMARY_MAX_TOKENS
+    )
+    turns = "\n".join(
+        f"{user_full_name if message.get('role') == 'user' else formatted(student_name)}: {message.get('content', '')}"
+        for message in messages
+    )
+    prompt = SYSTEM_PROMPT_HISTORY_SUMMARY.format(
+        student_name=formatted(student_name),
+        user_full_name=user_full_name,
+        summary=summary or "The conversation has just started.",
+        turns=turns,
+        max_words=int(CHAT_HISTORY_SUMMARY_MAX_TOKENS * 0.6)
+    )
+    response = await llm.ainvoke(prompt)
+    return response.content.strip()
+
+# Function to get the chat history window of the main student response prompt: the rolling summary of older turns and the recent
+# messages kept verbatim within CHAT_HISTORY_MAX_TOKENS. chat_session is the chat session item, whose history_summary and
+# summarized_message_count are advanced when messages are folded. If the summary cannot be updated, the previous one is kept
+# and the window is cut to the budget instead.
+async def get_history_window(global_session_id: str, chat_session: Dict, chat_history: List[Dict]) -> Tuple[bool, str, Dict]:
+    success = False
+    message = ""
+    summary = chat_session.get("history_summary", "")
+    summarized_message_count = min(int(chat_session.get("summarized_message_count", 0)), len(chat_history))
+    to_fold, recent = split_history_window(chat_history, summarized_message_count)
+    data = {"summary": summary, "messages": recent}
+
+    try:
+        if to_fold:
+            summary = await summarize_history(chat_session.get("student_name", ""), chat_session.get("user_full_name", ""), summary, to_fold)
+            summarized_message_count += len(to_fold)
+            update_success, update_message = update_chat_session_history_summary(global_session_id, summary, summarized_message_count)
+            if not update_success:
+                backend_logger.error(f"get_history_window | {update_message}")
+            chat_session["history_summary"] = summary
+            chat_session["summarized_message_count"] = summarized_message_count
+            increment_metric("chat_history.folds")
+            data = {"summary": summary, "messages": recent}
+
+        history_tokens = count_tokens(summary) + count_message_tokens(recent)
+        increment_metric("chat_history.windows")
+        set_metric("chat_history.last_window_tokens", history_tokens)
+        success = True
+        message = (
+            f"History window for global_session_id={global_session_id}: {len(recent)} recent messages, "
+            f"{summarized_message_count} summarized, ~{history_tokens} tokens"
+        )
+        backend_logger.info(f"get_history_window | {message}")
+    except Exception as e:
+        recent = to_fold + recent
+        while len(recent) > CHAT_HISTORY_MIN_RECENT_MESSAGES and count_message_tokens(recent) > CHAT_HISTORY_MAX_TOKENS:
+            recent = recent[2:]
+        data = {"summary": summary, "messages": recent}
+        message = f"Error summarizing chat history for global_session_id={global_session_id}, keeping the previous summary: {str(e)}"
+        backend_logger.error(f"get_history_window | {message}")
+    return success, message, data
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,122 @@
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from config.backend.dynamodb import (
+    CHAT_HISTORY_CACHE_IDLE_SECONDS,
+    CHAT_HISTORY_CACHE_MAX_SESSIONS
+)
+from utils.backend.all import get_chat_history, insert_chat_message
+from utils.shared.logger import backend_logger
+from utils.shared.metrics import get_metric_rate, increment_metric, set_metric
+from typing import Dict, List, Optional, Tuple
+
+# Write-through cache of chat histories, one entry per chat session, least recently used first.
+# An entry is filled from the chat messages table on first access and appended to on every insert, so steady-state turns
+# read no history from DynamoDB. Sessions idle for CHAT_HISTORY_CACHE_IDLE_SECONDS, or beyond CHAT_HISTORY_CACHE_MAX_SESSIONS, are evicted.
+class ChatHistoryCache:
+    def __init__(self, max_sessions: int = CHAT_HISTORY_CACHE_MAX_SESSIONS, idle_seconds: int = CHAT_HISTORY_CACHE_IDLE_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.lock = threading.Lock()
+        # Lock of each session with a load or insert in progress, and the number of threads holding or waiting for it.
+        self.session_locks: Dict[str, List] = {}
+
+    # Serialize the loads and appends of one session. A session's lock lives as long as a thread holds or waits for it,
+    # so it is never replaced while in use and does not outlive the session.
+    @contextmanager
+    def session_lock(self, global_session_id: str):
+        with self.lock:
+            session_lock = self.session_locks.setdefault(global_session_id, [threading.Lock(), 0])
+            session_lock[1] += 1
+        try:
+            with session_lock[0]:
+                yield
+        finally:
+            with self.lock:
+                session_lock[1] -= 1
+                if not session_lock[1]:
+                    del self.session_locks[global_session_id]
+
+    # Drop sessions idle for longer than idle_seconds, then the least recently used ones above max_sessions.
+    def evict(self):
+        now = time.monotonic()
+        with self.lock:
+            while self.entries:
+                global_session_id, entry = next(iter(self.entries.items()))
+                if now - entry["last_access"] <= self.idle_seconds and len(self.entries) <= self.max_sessions:
+                    break
+                del self.entries[global_session_id]
+                increment_metric("chat_history_cache.evictions")
+            set_metric("chat_history_cache.sessions", len(self.entries))
+
+    # Get a session's cached messages and mark the session as recently used.
+    def peek(self, global_session_id: str) -> Optional[List[Dict]]:
+        with self.lock:
+            entry = self.entries.get(global_session_id)
+            if entry is None:
+                return None
+            entry["last_access"] = time.monotonic()
+            self.entries.move_to_end(global_session_id)
+            return entry["messages"]
+
+    def put(self, global_session_id: str, messages: List[Dict]):
+        with self.lock:
+            self.entries[global_session_id] = {"messages": messages, "last_access": time.monotonic()}
+            self.entries.move_to_end(global_session_id)
+        self.evict()
+
+    # Get the chat history of a session, reading it from DynamoDB only on a miss. expected_message_count is the message_count
+    # of the chat session item when the caller has it; a cached history of a different length was written to by another
+    # backend process and is reloaded.
+    def get(self, global_session_id: str, expected_message_count: Optional[int] = None) -> Tuple[bool, str, List[Dict]]:
+        increment_metric("chat_history_cache.total")
+        messages = self.peek(global_session_id)
+        if messages is not None and (expected_message_count is None or len(messages) == expected_message_count):
+            increment_metric("chat_history_cache.hits")
+            return True, f"Served {len(messages)} cached messages for global_session_id={global_session_id}", list(messages)
+
+        with self.session_lock(global_session_id):
+            messages = self.peek(global_session_id)
+            if messages is not None and (expected_message_count is None or len(messages) == expected_message_count):
+                increment_metric("chat_history_cache.hits")
+                return True, f"Served {len(messages)} cached messages for global_session_id={global_session_id}", list(messages)
+
+            success, message, _, messages = get_chat_history(global_session_id)
+            if not success:
+                return False, message, []
+            self.put(global_session_id, messages)
+
+        message = f"{message} | hit rate: {get_metric_rate('chat_history_cache.hits', 'chat_history_cache.total'):.2%}"
+        backend_logger.info(f"ChatHistoryCache.get | {message}")
+        return True, message, list(messages)
+
+    # Insert a turn into DynamoDB and, once the write succeeded, append it to the cached history of the session.
+    def insert(self, global_session_id: str, user_input: str, user_input_kannada: Optional[str], input_type: str, assistant_output: str) -> Tuple[bool, str]:
+        with self.session_lock(global_session_id):
+            success, message, inserted_messages = insert_chat_message(global_session_id, user_input, user_input_kannada, input_type, assistant_output)
+            if not success:
+                with self.lock:
+                    self.entries.pop(global_session_id, None)
+                return success, message
+            messages = self.peek(global_session_id)
+            if messages is not None:
+                self.put(global_session_id, messages + inserted_messages)
+        return success, message
+
+_chat_history_cache: Optional[ChatHistoryCache] = None
+_chat_history_cache_lock = threading.Lock()
+
+# Function to get the process-wide chat history cache.
+def get_chat_history_cache() -> ChatHistoryCache:
+    global _chat_history_cache
+    if _chat_history_cache is None:
+        with _chat_history_cache_lock:
+            if _chat_history_cache is None:
+                _chat_history_cache = ChatHistoryCache()
+    return _chat_history_cache
+
+if __name__ == "__main__":
+    pass
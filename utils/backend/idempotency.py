@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import json
+import time
+
+from collections import OrderedDict
+from config.backend.api import (
+    IDEMPOTENCY_MAX_RESULTS,
+    IDEMPOTENCY_RESULT_TTL_SECONDS
+)
+from utils.shared.logger import backend_logger
+from utils.shared.metrics import increment_metric
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Header carrying the client-generated idempotency key of a mutating request.
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+# Deduplicates mutating requests by idempotency key. A duplicate of a request still in flight waits for the first one's result,
+# and a duplicate of a completed request is served from a short-lived result store instead of running again.
+# It is only used from the event loop of the backend, so it needs no lock.
+class IdempotencyStore:
+    def __init__(self, ttl_seconds: int = IDEMPOTENCY_RESULT_TTL_SECONDS, max_results: int = IDEMPOTENCY_MAX_RESULTS):
+        self.ttl_seconds = ttl_seconds
+        self.max_results = max_results
+        self.in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self.results: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+
+    def discard_expired(self):
+        now = time.monotonic()
+        while self.results:
+            key, (expires_at, _, _) = next(iter(self.results.items()))
+            if expires_at > now and len(self.results) <= self.max_results:
+                break
+            del self.results[key]
+
+    # Run a request once per idempotency key. Returns (success, message, result); success is False when the key was
+    # already used for a request with a different fingerprint. Exceptions are not stored, so a failed request can be retried.
+    async def run(self, idempotency_key: str, fingerprint: str, handler: Callable[[], Awaitable[Any]]) -> Tuple[bool, str, Any]:
+        self.discard_expired()
+        increment_metric("idempotency.requests")
+
+        if idempotency_key in self.results:
+            _, stored_fingerprint, result = self.results[idempotency_key]
+            if stored_fingerprint != fingerprint:
+                return False, f"{IDEMPOTENCY_KEY_HEADER}: {idempotency_key} was already used for a different request", None
+            increment_metric("idempotency.replayed")
+            backend_logger.info(f"IdempotencyStore.run | Replayed completed request for {IDEMPOTENCY_KEY_HEADER}: {idempotency_key}")
+            return True, "Replayed completed request", result
+
+        if idempotency_key in self.in_flight:
+            stored_fingerprint, future = self.in_flight[idempotency_key]
+            if stored_fingerprint != fingerprint:
+                return False, f"{IDEMPOTENCY_KEY_HEADER}: {idempotency_key} is already in use by a different request", None
+            increment_metric("idempotency.joined")
+            backend_logger.info(f"IdempotencyStore.run | Waiting on in-flight request for {IDEMPOTENCY_KEY_HEADER}: {idempotency_key}")
+            return True, "Joined in-flight request", await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[idempotency_key] = (fingerprint, future)
+        try:
+            result = await handler()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when no duplicate is waiting on it.
+            future.exception()
+            raise
+        finally:
+            self.in_flight.pop(idempotency_key, None)
+
+        future.set_result(result)
+        self.results[idempotency_key] = (time.monotonic() + self.ttl_seconds, fingerprint, result)
+        return True, "Completed request", result
+
+_idempotency_store: Optional[IdempotencyStore] = None
+
+# Function to get the process-wide idempotency store.
+def get_idempotency_store() -> IdempotencyStore:
+    global _idempotency_store
+    if _idempotency_store is None:
+        _idempotency_store = IdempotencyStore()
+    return _idempotency_store
+
+# Function to fingerprint a request body, so that a key reused for a different request is rejected rather than replayed.
+def get_request_fingerprint(path: str, payload: Dict) -> str:
+    return hashlib.sha256(f"{path}\n{json.dumps(payload, sort_keys=True, default=str)}".encode('utf-8')).hexdigest()
+
+# Function to run a mutating request handler with deduplication. Requests without an idempotency key always run.
+async def run_idempotent(idempotency_key: Optional[str], path: str, payload: Dict, handler: Callable[[], Awaitable[Any]]) -> Tuple[bool, str, Any]:
+    if not idempotency_key:
+        return True, "Completed request without idempotency key", await handler()
+    return await get_idempotency_store().run(idempotency_key, get_request_fingerprint(path, payload), handler)
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import io
+import multiprocessing
+import os
+import unicodedata
+import zipfile
+
+from concurrent.futures import ProcessPoolExecutor
+from config.backend.s3 import (
+    MAIN_S3_BUCKET_NAME,
+    STUDENT_DOCUMENTS_FOLDER_PATH
+)
+from config.backend.vectorstore import (
+    DOCUMENT_CHUNK_OVERLAP,
+    DOCUMENT_CHUNK_SIZE,
+    VECTORSTORE_BUILD_MAX_WORKERS
+)
+from botocore.exceptions import ClientError
+from tempfile import TemporaryFile
+from utils.backend.all import get_aws_client
+from utils.backend.vectorstore import get_chunk_content_hash
+from utils.shared.logger import backend_logger
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+from xml.etree import ElementTree
+
+SUPPORTED_DOCUMENT_EXTENSIONS = (".docx", ".txt")
+
+# Tag names of the WordprocessingML elements read from word/document.xml.
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+WORD_PARAGRAPH_TAG = f"{WORD_NAMESPACE}p"
+WORD_TEXT_TAG = f"{WORD_NAMESPACE}t"
+WORD_TABLE_TAG = f"{WORD_NAMESPACE}tbl"
+WORD_TABLE_ROW_TAG = f"{WORD_NAMESPACE}tr"
+WORD_TABLE_CELL_TAG = f"{WORD_NAMESPACE}tc"
+WORD_BREAK_TAGS = (f"{WORD_NAMESPACE}tab", f"{WORD_NAMESPACE}br", f"{WORD_NAMESPACE}cr")
+
+# Function to list the S3 keys of a student's source documents.
+def list_student_document_keys(student_name: str) -> Tuple[bool, str, List[str]]:
+    success = False
+    message = ""
+    data = []
+    try:
+        s3_client = get_aws_client('s3')
+        paginator = s3_client.get_paginator('list_objects_v2')
+        prefix = f"{STUDENT_DOCUMENTS_FOLDER_PATH}/{student_name}/"
+        for page in paginator.paginate(Bucket=MAIN_S3_BUCKET_NAME, Prefix=prefix):
+            for item in page.get('Contents', []):
+                if item['Key'].lower().endswith(SUPPORTED_DOCUMENT_EXTENSIONS):
+                    data.append(item['Key'])
+
+        success = True
+        message = f"Found {len(data)} source documents for student: {student_name}"
+        backend_logger.info(f"list_student_document_keys | {message}")
+    except ClientError as e:
+        message = f"Error listing source documents for student: {student_name}: {str(e)}"
+        backend_logger.error(f"list_student_document_keys | {message}")
+    return success, message, sorted(data)
+
+# Function to stream paragraphs and table rows out of a .docx file in document order.
+# word/document.xml is parsed incrementally and every finished paragraph, row or table is cleared and detached from its parent,
+# so the whole document is never held in memory. Paragraphs nested in a paragraph (text boxes) are part of the outer paragraph.
+def iter_docx_blocks(file: BinaryIO) -> Iterator[str]:
+    with zipfile.ZipFile(file) as archive, archive.open("word/document.xml") as document_xml:
+        table_depth = 0
+        paragraph_depth = 0
+        paragraph_parts = []
+        cell_parts = []
+        row_cells = []
+        elements = []
+        for event, element in ElementTree.iterparse(document_xml, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                elements.append(element)
+                if tag == WORD_TABLE_TAG:
+                    table_depth += 1
+                elif tag == WORD_PARAGRAPH_TAG:
+                    if paragraph_depth:
+                        paragraph_parts.append(" ")
+                    paragraph_depth += 1
+                continue
+
+            elements.pop()
+            parent = elements[-1] if elements else None
+            if tag == WORD_TEXT_TAG:
+                paragraph_parts.append(element.text or "")
+            elif tag in WORD_BREAK_TAGS:
+                paragraph_parts.append(" ")
+            elif tag == WORD_PARAGRAPH_TAG:
+                paragraph_depth -= 1
+                if paragraph_depth:
+                    paragraph_parts.append(" ")
+                    continue
+                paragraph = "".join(paragraph_parts)
+                paragraph_parts = []
+                if table_depth:
+                    cell_parts.append(paragraph)
+                elif paragraph.strip():
+                    yield paragraph
+            elif tag == WORD_TABLE_CELL_TAG and table_depth == 1:
+                row_cells.append(" ".join(part for part in cell_parts if part.strip()))
+                cell_parts = []
+            elif tag == WORD_TABLE_ROW_TAG and table_depth == 1:
+                row = " | ".join(cell for cell in row_cells if cell)
+                row_cells = []
+                if row:
+                    yield row
+            elif tag == WORD_TABLE_TAG:
+                table_depth -= 1
+            else:
+                continue
+
+            if paragraph_depth == 0 and parent is not None:
+                element.clear()
+                parent.remove(element)
+
+# Function to stream the lines of a UTF-8 text file.
+def iter_text_blocks(file: BinaryIO) -> Iterator[str]:
+    for line in io.TextIOWrapper(file, encoding="utf-8"):
+        if line.strip():
+            yield line
+
+# Function to normalize a block of text (Unicode NFKC, collapsed whitespace).
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+# Function to split one normalized block into overlapping windows of at most chunk_size characters, breaking on whitespace where possible.
+def iter_block_windows(block: str, chunk_size: int = DOCUMENT_CHUNK_SIZE, chunk_overlap: int = DOCUMENT_CHUNK_OVERLAP) -> Iterator[str]:
+    while len(block) > chunk_size:
+        end = block.rfind(" ", chunk_overlap + 1, chunk_size)
+        if end == -1:
+            end = chunk_size
+        yield block[:end].strip()
+        start = max(end - chunk_overlap, 1)
+        word_start = block.find(" ", start, end)
+        if word_start != -1:
+            start = word_start + 1
+        block = block[start:]
+    if block.strip():
+        yield block.strip()
+
+# Function to decide from a block's text alone whether a chunk ends after it. A block of n characters ends its chunk with
+# probability n / (chunk_size / 2), so chunks average about half of chunk_size and every block of that length or more ends one.
+def is_chunk_boundary(block: str, chunk_size: int = DOCUMENT_CHUNK_SIZE) -> bool:
+    digest = int.from_bytes(hashlib.blake2b(block.encode("utf-8"), digest_size=8).digest(), "big")
+    return digest % max(1, chunk_size // 2) < len(block)
+
+# Function to turn a stream of text blocks into chunks of at most chunk_size characters made of whole blocks.
+# Chunk boundaries are content-defined (see is_chunk_boundary), so an edit changes the chunk holding the edited block and the
+# boundaries realign right after it: the other chunks keep their content hash and their embedding is reused by the next build.
+# Only blocks longer than chunk_size are split, into windows overlapping by chunk_overlap characters.
+def iter_chunks(blocks: Iterable[str], chunk_size: int = DOCUMENT_CHUNK_SIZE, chunk_overlap: int = DOCUMENT_CHUNK_OVERLAP) -> Iterator[str]:
+    chunk = ""
+    for block in blocks:
+        block = normalize_text(block)
+        if not block:
+            continue
+        for window in iter_block_windows(block, chunk_size, chunk_overlap):
+            if chunk and len(chunk) + 1 + len(window) > chunk_size:
+                yield chunk
+                chunk = ""
+            chunk = f"{chunk} {window}" if chunk else window
+            if is_chunk_boundary(window, chunk_size):
+                yield chunk
+                chunk = ""
+    if chunk:
+        yield chunk
+
+# Function to measure how many chunks of a document survive a local edit: the document is chunked before and after one
+# sentence of one of its paragraphs is changed, and the chunks of the edited version already present before are counted.
+def measure_chunk_reuse(paragraphs: List[str], edited_paragraph_index: int, chunk_size: int = DOCUMENT_CHUNK_SIZE, chunk_overlap: int = DOCUMENT_CHUNK_OVERLAP) -> Tuple[int, int]:
+    edited_paragraphs = list(paragraphs)
+    edited_paragraphs[edited_paragraph_index] = edited_paragraphs[edited_paragraph_index].replace(".", ", which was edited afterwards.", 1)
+    previous_chunks = set(iter_chunks(paragraphs, chunk_size, chunk_overlap))
+    chunks = list(iter_chunks(edited_paragraphs, chunk_size, chunk_overlap))
+    return sum(chunk in previous_chunks for chunk in chunks), len(chunks)
+
+# Function to download one source document from S3 and turn it into chunk records ready for embedding.
+def ingest_document(student_name: str, s3_key: str, chunk_size: int = DOCUMENT_CHUNK_SIZE, chunk_overlap: int = DOCUMENT_CHUNK_OVERLAP) -> Tuple[bool, str, List[Dict]]:
+    success = False
+    message = ""
+    data = []
+    source = os.path.basename(s3_key)
+    try:
+        s3_client = get_aws_client('s3')
+        with TemporaryFile() as file:
+            s3_client.download_fileobj(Bucket=MAIN_S3_BUCKET_NAME, Key=s3_key, Fileobj=file)
+            file.seek(0)
+            blocks = iter_docx_blocks(file) if s3_key.lower().endswith(".docx") else iter_text_blocks(file)
+            for chunk_index, chunk in enumerate(iter_chunks(blocks, chunk_size, chunk_overlap)):
+                data.append({
+                    "student_name": student_name,
+                    "source": source,
+                    "chunk_index": chunk_index,
+                    "text": chunk,
+                    "content_hash": get_chunk_content_hash(chunk)
+                })
+
+        success = True
+        message = f"Ingested {len(data)} chunks from {s3_key}"
+        backend_logger.info(f"ingest_document | {message}")
+    except ClientError as e:
+        message = f"Error downloading source document {s3_key}: {str(e)}"
+        backend_logger.error(f"ingest_document | {message}")
+    except Exception as e:
+        message = f"Unexpected error ingesting source document {s3_key}: {str(e)}"
+        backend_logger.error(f"ingest_document | {message}")
+    return success, message, data
+
+# Function to ingest every source document of the given students across a worker pool, grouping chunk records by student.
+def ingest_student_documents(student_names: List[str], max_workers: int = VECTORSTORE_BUILD_MAX_WORKERS) -> Tuple[bool, str, Dict[str, List[Dict]]]:
+    success = False
+    message = ""
+    data = {student_name: [] for student_name in student_names}
+
+    document_students = []
+    document_keys = []
+    for student_name in student_names:
+        keys_success, keys_message, keys = list_student_document_keys(student_name)
+        if not keys_success:
+            return success, keys_message, data
+        document_students.extend([student_name] * len(keys))
+        document_keys.extend(keys)
+
+    if not document_keys:
+        message = "No source documents found"
+        backend_logger.error(f"ingest_student_documents | {message}")
+        return success, message, data
+
+    failed_documents = []
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(document_keys)), mp_context=multiprocessing.get_context("spawn")) as executor:
+        results = executor.map(ingest_document, document_students, document_keys)
+        for student_name, s3_key, (ingest_success, _, chunks) in zip(document_students, document_keys, results):
+            if not ingest_success:
+                failed_documents.append(s3_key)
+                continue
+            data[student_name].extend(chunks)
+
+    if failed_documents:
+        message = f"Failed to ingest source documents: {', '.join(failed_documents)}"
+        backend_logger.error(f"ingest_student_documents | {message}")
+        return success, message, data
+
+    success = True
+    message = f"Ingested {len(document_keys)} source documents into {sum(len(chunks) for chunks in data.values())} chunks"
+    backend_logger.info(f"ingest_student_documents | {message}")
+    return success, message, data
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check how many chunks of a document are reused after editing one sentence.")
+    parser.add_argument("--paragraphs", type=int, default=50, help="Number of synthetic paragraphs")
+    parser.add_argument("--edited-paragraph", type=int, default=1, help="Index of the edited paragraph")
+    parser.add_argument("--trials", type=int, default=20, help="Number of synthetic documents")
+    args = parser.parse_args()
+
+    import random
+    words = "the school science fair village teacher friends mathematics cricket river evening library project mother bus morning".split()
+    total_reused = 0
+    total_chunks = 0
+    for trial in range(args.trials):
+        rng = random.Random(trial)
+        paragraphs = [
+            " ".join(" ".join(rng.choice(words) for _ in range(rng.randint(6, 18))).capitalize() + "." for _ in range(rng.randint(2, 6)))
+            for _ in range(args.paragraphs)
+        ]
+        reused, chunk_count = measure_chunk_reuse(paragraphs, args.edited_paragraph)
+        total_reused += reused
+        total_chunks += chunk_count
+        print(f"document {trial}: reused {reused} of {chunk_count} chunks")
+    print(f"average: {(total_chunks - total_reused) / args.trials:.2f} chunks re-embedded per edit, {total_reused / total_chunks:.1%} reused")
@@ -0,0 +1,90 @@
+import math
+import numpy as np
+import re
+
+from collections import Counter
+from typing import Dict, List
+
+# BM25 parameters used when building a student's lexical index.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = frozenset([
+    "a", "about", "an", "and", "are", "as", "at", "be", "by", "can", "did", "do", "does", "for", "from", "had", "has",
+    "have", "how", "i", "in", "is", "it", "its", "me", "my", "of", "on", "or", "so", "that", "the", "their", "them",
+    "there", "they", "this", "to", "was", "we", "were", "what", "when", "where", "which", "who", "why", "will", "with",
+    "you", "your"
+])
+
+# Function to split text into lowercase lexical terms, dropping stopwords and single characters.
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+# Function to build the precomputed BM25 inverted index of a student's chunks, stored next to the embeddings.
+def build_lexical_index(texts: List[str], k1: float = BM25_K1, b: float = BM25_B) -> Dict:
+    postings = {}
+    document_lengths = []
+    for document_id, text in enumerate(texts):
+        terms = Counter(tokenize(text))
+        document_lengths.append(sum(terms.values()))
+        for term, frequency in terms.items():
+            postings.setdefault(term, []).append([document_id, frequency])
+
+    document_count = len(texts)
+    return {
+        "k1": k1,
+        "b": b,
+        "average_document_length": (sum(document_lengths) / document_count) if document_count else 0.0,
+        "document_lengths": document_lengths,
+        "idf": {term: math.log(1 + (document_count - len(term_postings) + 0.5) / (len(term_postings) + 0.5)) for term, term_postings in postings.items()},
+        "postings": postings
+    }
+
+# BM25 scorer over a precomputed inverted index. Posting lists are turned into arrays once at load time,
+# so scoring a question only touches the postings of its terms.
+class LexicalIndex:
+    def __init__(self, data: Dict):
+        self.document_count = len(data["document_lengths"])
+        self.idf = data["idf"]
+        average_document_length = data["average_document_length"] or 1.0
+        document_lengths = np.asarray(data["document_lengths"], dtype=np.float32)
+        self.k1 = data["k1"]
+        self.length_norms = self.k1 * (1 - data["b"] + data["b"] * document_lengths / average_document_length)
+        self.postings = {
+            term: (
+                np.asarray([posting[0] for posting in term_postings], dtype=np.int32),
+                np.asarray([posting[1] for posting in term_postings], dtype=np.float32)
+            )
+            for term, term_postings in data["postings"].items()
+        }
+
+    # Score every chunk against a question with BM25.
+    def score(self, question: str) -> np.ndarray:
+        scores = np.zeros(self.document_count, dtype=np.float32)
+        for term in set(tokenize(question)):
+            if term not in self.postings:
+                continue
+            document_ids, frequencies = self.postings[term]
+            scores[document_ids] += self.idf[term] * frequencies * (self.k1 + 1) / (frequencies + self.length_norms[document_ids])
+        return scores
+
+# Function to decide whether lexical scores alone are decisive: a strong best match that clearly beats the runner-up.
+def is_lexically_decisive(scores: np.ndarray, min_score: float, min_ratio: float) -> bool:
+    if len(scores) == 0:
+        return False
+    if len(scores) == 1:
+        return float(scores[0]) >= min_score
+    second, best = np.partition(scores, len(scores) - 2)[-2:]
+    return float(best) >= min_score and float(best) >= min_ratio * float(second)
+
+# Function to fuse lexical and vector scores: both are min-max normalized and combined with the given lexical weight.
+def fuse_scores(lexical_scores: np.ndarray, vector_scores: np.ndarray, lexical_weight: float) -> np.ndarray:
+    def normalize(scores: np.ndarray) -> np.ndarray:
+        spread = float(scores.max() - scores.min()) if len(scores) else 0.0
+        return (scores - scores.min()) / spread if spread > 0 else np.zeros_like(scores)
+    return lexical_weight * normalize(lexical_scores) + (1 - lexical_weight) * normalize(vector_scores)
+
+if __name__ == "__main__":
+    pass
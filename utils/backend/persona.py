@@ -0,0 +1,101 @@
+import hashlib
+import json
+import re
+
+from config.backend.llm import (
+    PERSONA_CARD_MAX_WORDS,
+    PERSONA_CARD_MODEL_ID,
+    PERSONA_CARD_MODEL_MAX_TOKENS
+)
+from langchain_aws.chat_models import ChatBedrock
+from prompts.backend import SYSTEM_PROMPT_PERSONA_CARD
+from utils.shared.logger import backend_logger
+from utils.shared.other import formatted
+from typing import Dict, List, Optional, Tuple
+
+# Bumped whenever SYSTEM_PROMPT_PERSONA_CARD changes, so that existing cards are regenerated on the next build.
+PERSONA_CARD_PROMPT_VERSION = 1
+
+# Function to compute the checksum of the inputs of a persona card: the chunk content hashes, model and prompt version.
+def get_persona_source_checksum(chunks: List[Dict]) -> str:
+    digest = hashlib.sha256(f"{PERSONA_CARD_MODEL_ID}:{PERSONA_CARD_PROMPT_VERSION}:{PERSONA_CARD_MAX_WORDS}\n".encode('utf-8'))
+    for chunk in chunks:
+        digest.update(f"{chunk['content_hash']}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+# Function to join a student's chunks into the documents block of the persona card prompt, dropping exact duplicates.
+def get_persona_documents(chunks: List[Dict]) -> str:
+    seen = set()
+    documents = []
+    for chunk in chunks:
+        if chunk["content_hash"] in seen:
+            continue
+        seen.add(chunk["content_hash"])
+        documents.append(chunk["text"])
+    return "\n\n".join(documents)
+
+# Function to parse the persona card JSON returned by the model, dropping duplicate facts.
+def parse_persona_card(generated_text: str) -> Optional[Dict]:
+    match = re.search(r'\{.*\}', generated_text, re.DOTALL)
+    if not match:
+        return None
+    persona = json.loads(match.group(0))
+    card = " ".join(str(persona.get("card", "")).split())
+    if not card:
+        return None
+    facts = []
+    seen = set()
+    for fact in persona.get("facts", []):
+        fact = " ".join(str(fact).split())
+        if fact and fact.lower() not in seen:
+            seen.add(fact.lower())
+            facts.append(fact)
+    return {"card": card, "facts": facts}
+
+# Function to distill a student's chunks into a compact persona card and fact list, reusing the previous card when its inputs are unchanged.
+def build_persona_card(student_name: str, chunks: List[Dict], previous_persona: Optional[Dict] = None) -> Tuple[bool, str, Dict]:
+    success = False
+    message = ""
+    source_checksum = get_persona_source_checksum(chunks)
+    data = {"card": "", "facts": [], "source_checksum": source_checksum}
+
+    if previous_persona and previous_persona.get("source_checksum") == source_checksum and previous_persona.get("card"):
+        message = f"Reused persona card for student: {student_name}"
+        backend_logger.info(f"build_persona_card | {message}")
+        return True, message, previous_persona
+
+    try:
+        llm = ChatBedrock(
+            model=PERSONA_CARD_MODEL_ID,
+            temperature=0,
+            max_tokens=PERSONA_CARD_MODEL_MAX_TOKENS
+        )
+        prompt = SYSTEM_PROMPT_PERSONA_CARD.format(
+            student_name=formatted(student_name),
+            documents=get_persona_documents(chunks),
+            max_words=PERSONA_CARD_MAX_WORDS
+        )
+        persona = parse_persona_card(llm.invoke(prompt).content)
+        if persona is None:
+            message = f"Model returned no persona card for student: {student_name}"
+            backend_logger.error(f"build_persona_card | {message}")
+            return success, message, data
+
+        data.update(persona)
+        success = True
+        message = f"Built persona card for student: {student_name} ({len(data['card'].split())} words, {len(data['facts'])} facts)"
+        backend_logger.info(f"build_persona_card | {message}")
+    except Exception as e:
+        message = f"Error building persona card for student: {student_name}: {str(e)}"
+        backend_logger.error(f"build_persona_card | {message}")
+    return success, message, data
+
+# Function to render a persona card and its facts for the <persona> block of SYSTEM_PROMPT_MAIN_PREFIX.
+def format_persona_card(persona: Optional[Dict]) -> str:
+    if not persona or not persona.get("card"):
+        return ""
+    facts = "\n".join(f"- {fact}" for fact in persona.get("facts", []))
+    return f"{persona['card']}\n\nFacts:\n{facts}" if facts else persona["card"]
+
+if __name__ == "__main__":
+    pass
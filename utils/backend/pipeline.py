@@ -0,0 +1,165 @@
+import asyncio
+
+from utils.backend.all import get_chat_session
+from utils.backend.answer_cache import get_first_turn_answer, is_first_turn, store_first_turn_answer
+from utils.backend.chat import generate_student_response, get_standalone_question
+from utils.backend.drafts import commit_draft_answer, speculate_answers
+from utils.backend.history import get_history_window
+from utils.backend.history_cache import get_chat_history_cache
+from utils.backend.idempotency import run_idempotent
+from utils.backend.retrieval import format_context, get_student_index, retrieve_persona_context
+from utils.shared.logger import backend_logger
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Function to generate the student's answer to one instructor question without persisting anything.
+# chat_session is the chat session item and chat_history the full history of the session in the format of get_chat_history;
+# only the window returned by get_history_window (rolling summary and recent messages) is sent to the models.
+# A first turn, whose history holds only the system greeting, is answered from the shared first-turn answer cache when it can.
+async def generate_turn_answer(global_session_id: str, chat_session: Dict, chat_history: List[Dict], question: str, input_type: str, user_full_name: str, student_name: str) -> Tuple[bool, str, str]:
+    store_version = None
+    first_turn = is_first_turn(chat_history)
+    if first_turn:
+        index_success, index_message, index = await asyncio.to_thread(get_student_index, student_name)
+        if not index_success:
+            return False, index_message, ""
+        store_version = index.version
+        cached_answer = get_first_turn_answer(student_name, store_version, question, user_full_name)
+        if cached_answer is not None:
+            return True, f"Served cached first-turn answer for student: {student_name}", cached_answer
+
+    _, _, history_window = await get_history_window(global_session_id, chat_session, chat_history)
+    _, _, standalone_question = await get_standalone_question(question, input_type, history_window["messages"])
+
+    context_success, context_message, persona_context = await asyncio.to_thread(retrieve_persona_context, student_name, standalone_question, global_session_id)
+    if not context_success:
+        return False, context_message, ""
+
+    response_success, response_message, response = await generate_student_response(
+        student_name=student_name,
+        user_full_name=user_full_name,
+        persona_card=persona_context["persona_card"],
+        context=format_context(persona_context["chunks"]),
+        history_summary=history_window["summary"],
+        chat_history=history_window["messages"],
+        question=question
+    )
+    if not response_success:
+        return False, response_message, ""
+    if first_turn:
+        store_first_turn_answer(student_name, store_version, question, user_full_name, response["answer"])
+    return True, response_message, response["answer"]
+
+# Function to load the chat session item and the full history of a session. The history is read through the write-through
+# chat history cache, so steady-state turns read no messages from DynamoDB.
+async def load_chat_session_state(global_session_id: str) -> Tuple[bool, str, Dict, List[Dict]]:
+    session_success, session_message, session_found, chat_session = await asyncio.to_thread(get_chat_session, global_session_id)
+    if not session_success or not session_found:
+        return False, session_message, {}, []
+
+    # The session item's message_count tells whether a cached history is still complete.
+    expected_message_count = int(chat_session["message_count"]) if "message_count" in chat_session else None
+    history_success, history_message, chat_history = await asyncio.to_thread(get_chat_history_cache().get, global_session_id, expected_message_count)
+    if not history_success:
+        return False, history_message, {}, []
+    return True, history_message, chat_session, chat_history
+
+# Function to answer one instructor turn of a chat session and store it: it loads the session item and history, takes the
+# draft answer of a clicked suggestion or generates the answer, and inserts the question and answer into the chat messages table.
+async def answer_chat_turn_once(login_session_id: str, chat_session_id: str, question: str, question_kannada: Optional[str], input_type: str, user_full_name: str, student_name: str) -> Tuple[bool, str, str]:
+    success = False
+    message = ""
+    data = ""
+    global_session_id = f"{login_session_id}#{chat_session_id}"
+
+    try:
+        state_success, state_message, chat_session, chat_history = await load_chat_session_state(global_session_id)
+        if not state_success:
+            return success, state_message, data
+
+        answer = await commit_draft_answer(global_session_id, question, input_type, len(chat_history))
+        if answer is None:
+            answer_success, answer_message, answer = await generate_turn_answer(global_session_id, chat_session, chat_history, question, input_type, user_full_name, student_name)
+            if not answer_success:
+                return success, answer_message, data
+
+        insert_success, insert_message = await asyncio.to_thread(get_chat_history_cache().insert, global_session_id, question, question_kannada, input_type, answer)
+        if not insert_success:
+            return success, insert_message, data
+
+        success = True
+        data = answer
+        message = f"Answered chat turn for global_session_id={global_session_id}"
+        backend_logger.info(f"answer_chat_turn | {message}")
+    except Exception as e:
+        message = f"Error answering chat turn for global_session_id={global_session_id}: {str(e)}"
+        backend_logger.error(f"answer_chat_turn | {message}")
+    return success, message, data
+
+# Function to run a route body once per idempotency key (see run_idempotent). Only successful results are kept for replay,
+# so a duplicate of a failed request runs again.
+async def run_route_idempotent(idempotency_key: Optional[str], path: str, payload: Dict, handler: Callable[[], Awaitable[Tuple]]) -> Tuple:
+    async def run_handler() -> Tuple:
+        result = await handler()
+        if not result[0]:
+            raise RuntimeError(result[1])
+        return result
+
+    try:
+        idempotent_success, idempotent_message, result = await run_idempotent(idempotency_key, path, payload, run_handler)
+    except RuntimeError as e:
+        return False, str(e), None
+    if not idempotent_success:
+        backend_logger.error(f"run_route_idempotent | {idempotent_message}")
+        return False, idempotent_message, None
+    return result
+
+# Function to answer one instructor turn of a chat session. This is the whole body of the /chat route of the backend server,
+# which passes the Idempotency-Key header (IDEMPOTENCY_KEY_HEADER) of the request: a duplicate of a turn, e.g. a Streamlit rerun
+# or a double click on a suggestion, is answered and stored once.
+async def answer_chat_turn(login_session_id: str, chat_session_id: str, question: str, question_kannada: Optional[str], input_type: str, user_full_name: str, student_name: str, idempotency_key: Optional[str] = None) -> Tuple[bool, str, str]:
+    payload = {
+        "login_session_id": login_session_id,
+        "chat_session_id": chat_session_id,
+        "question": question,
+        "question_kannada": question_kannada,
+        "input_type": input_type,
+        "user_full_name": user_full_name,
+        "student_name": student_name
+    }
+    success, message, data = await run_route_idempotent(idempotency_key, "/chat", payload, lambda: answer_chat_turn_once(**payload))
+    return success, message, data or ""
+
+# Function to pre-answer the suggested next questions of a chat session as uncommitted drafts. This is the whole body of the
+# /speculate-answers route of the backend server; the drafts are generated in the background and taken by answer_chat_turn
+# when the instructor clicks the matching suggestion before anything else is added to the session.
+async def speculate_chat_answers(login_session_id: str, chat_session_id: str, questions: List[str], user_email: str, user_full_name: str, student_name: str, idempotency_key: Optional[str] = None) -> Tuple[bool, str, int]:
+    payload = {
+        "login_session_id": login_session_id,
+        "chat_session_id": chat_session_id,
+        "questions": questions,
+        "user_email": user_email,
+        "user_full_name": user_full_name,
+        "student_name": student_name
+    }
+    success, message, count = await run_route_idempotent(idempotency_key, "/speculate-answers", payload, lambda: speculate_chat_answers_once(**payload))
+    return success, message, count or 0
+
+# Function to start the speculative answers of a chat session's suggested next questions once per request.
+async def speculate_chat_answers_once(login_session_id: str, chat_session_id: str, questions: List[str], user_email: str, user_full_name: str, student_name: str) -> Tuple[bool, str, int]:
+    global_session_id = f"{login_session_id}#{chat_session_id}"
+    try:
+        state_success, state_message, chat_session, chat_history = await load_chat_session_state(global_session_id)
+        if not state_success:
+            return False, state_message, 0
+    except Exception as e:
+        message = f"Error loading chat session for speculative answers, global_session_id={global_session_id}: {str(e)}"
+        backend_logger.error(f"speculate_chat_answers | {message}")
+        return False, message, 0
+
+    async def answer_question(question: str) -> Tuple[bool, str, str]:
+        return await generate_turn_answer(global_session_id, dict(chat_session), chat_history, question, "button", user_full_name, student_name)
+
+    return speculate_answers(global_session_id, user_email, len(chat_history), questions, answer_question)
+
+if __name__ == "__main__":
+    pass
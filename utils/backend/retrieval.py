@@ -0,0 +1,240 @@
+import json
+import numpy as np
+import os
+import re
+import threading
+
+from config.backend.vectorstore import (
+    RAG_LEXICAL_DECISIVE_RATIO,
+    RAG_LEXICAL_DECISIVE_SCORE,
+    RAG_FOLLOW_UP_REUSE_SIMILARITY,
+    RAG_LEXICAL_WEIGHT,
+    RAG_MAX_DOC_RETRIEVE,
+    RAG_MAX_DOC_RETRIEVE_WITH_PERSONA_CARD,
+    RAG_RESULT_CACHE_SIZE,
+    VECTORSTORE_INDEX_DTYPE
+)
+from utils.backend.lexical import (
+    LexicalIndex,
+    fuse_scores,
+    is_lexically_decisive
+)
+from utils.backend.persona import format_persona_card
+from utils.backend.quantization import (
+    load_embeddings,
+    score_embeddings,
+    top_k
+)
+from utils.backend.vectorstore import (
+    VECTORSTORE_EMBEDDINGS_FILE_NAME,
+    VECTORSTORE_LEXICAL_FILE_NAME,
+    VECTORSTORE_METADATA_FILE_NAME,
+    VECTORSTORE_PERSONA_FILE_NAME,
+    get_embeddings_model
+)
+from utils.backend.vectorstore_cache import get_vectorstore_cache
+from collections import OrderedDict
+from utils.shared.logger import backend_logger
+from utils.shared.metrics import increment_metric
+from typing import Dict, List, Optional, Tuple
+
+# In-process index over one student's vectorstore artifact.
+# The L2-normalized embedding matrix is memory-mapped from embeddings.npy (or its float16/int8 derivative, see VECTORSTORE_INDEX_DTYPE),
+# so the OS page cache is shared between worker processes and only the pages actually scored are resident; chunk texts come from metadata.json.
+# Stores built before the lexical index or persona cards were introduced have no lexical.json or persona.json, in which case
+# retrieval is vector-only and persona_card is empty.
+class StudentVectorIndex:
+    def __init__(self, directory: str, checksum: str = None, version: int = None, dtype: str = VECTORSTORE_INDEX_DTYPE):
+        self.directory = directory
+        self.checksum = checksum
+        self.version = version
+        self.dtype = dtype
+        self.embeddings, self.scales = load_embeddings(directory, VECTORSTORE_EMBEDDINGS_FILE_NAME, dtype)
+        with open(os.path.join(directory, VECTORSTORE_METADATA_FILE_NAME), "r", encoding="utf-8") as file:
+            metadata = json.load(file)
+        self.texts = [chunk["text"] for chunk in metadata.get("chunks", [])]
+        self.sources = [chunk.get("source") for chunk in metadata.get("chunks", [])]
+        lexical_path = os.path.join(directory, VECTORSTORE_LEXICAL_FILE_NAME)
+        self.lexical_index = None
+        if os.path.exists(lexical_path):
+            with open(lexical_path, "r", encoding="utf-8") as file:
+                self.lexical_index = LexicalIndex(json.load(file))
+        persona_path = os.path.join(directory, VECTORSTORE_PERSONA_FILE_NAME)
+        self.persona_card = ""
+        if os.path.exists(persona_path):
+            with open(persona_path, "r", encoding="utf-8") as file:
+                self.persona_card = format_persona_card(json.load(file))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    # Score every chunk with a single vectorized (dequantize-and-)dot product and return the top-k (index, score) pairs, best first.
+    def search(self, query_vector: np.ndarray, k: int = RAG_MAX_DOC_RETRIEVE) -> List[Tuple[int, float]]:
+        if len(self) == 0:
+            return []
+        return top_k(score_embeddings(self.embeddings, self.scales, query_vector), k)
+
+    # Rank chunks by BM25 fused with vector similarity. The question is only embedded (via embed_question) when
+    # the BM25 ranking alone is not decisive; the second return value tells whether the embedding call was skipped.
+    def hybrid_search(self, question: str, embed_question, k: int = RAG_MAX_DOC_RETRIEVE) -> Tuple[List[Tuple[int, float]], bool]:
+        if len(self) == 0:
+            return [], True
+        if self.lexical_index is None:
+            return self.search(embed_question(question), k), False
+        lexical_scores = self.lexical_index.score(question)
+        if is_lexically_decisive(lexical_scores, RAG_LEXICAL_DECISIVE_SCORE, RAG_LEXICAL_DECISIVE_RATIO):
+            return top_k(lexical_scores, k), True
+        vector_scores = score_embeddings(self.embeddings, self.scales, embed_question(question))
+        return top_k(fuse_scores(lexical_scores, vector_scores, RAG_LEXICAL_WEIGHT), k), False
+
+_student_indexes: Dict[str, StudentVectorIndex] = {}
+_student_indexes_lock = threading.Lock()
+
+# Retrieved chunks keyed by (student_name, store version, normalized question), least recently used first.
+_retrieval_cache: "OrderedDict[Tuple[str, Optional[int], str], List[str]]" = OrderedDict()
+# Last retrieval of each chat session: (student_name, store version, normalized question, chunks).
+_previous_session_retrievals: "OrderedDict[str, Tuple[str, Optional[int], str, List[str]]]" = OrderedDict()
+_retrieval_cache_lock = threading.Lock()
+
+# Function to drop the loaded index and cached retrievals of a student whose local store was evicted or replaced.
+def unload_student_index(student_name: str):
+    with _student_indexes_lock:
+        _student_indexes.pop(student_name, None)
+    with _retrieval_cache_lock:
+        for key in [key for key in _retrieval_cache if key[0] == student_name]:
+            del _retrieval_cache[key]
+
+# Function to get the loaded index of a student, syncing the local store with the S3 manifest through the vectorstore cache.
+# The store is pinned until its index is loaded, so that another thread's eviction cannot remove it in between.
+def get_student_index(student_name: str) -> Tuple[bool, str, StudentVectorIndex]:
+    cache = get_vectorstore_cache()
+    with cache.pin(student_name):
+        local_success, local_message, local_store = cache.ensure(student_name)
+        if not local_success:
+            return False, local_message, None
+
+        index = _student_indexes.get(student_name)
+        if index is not None and index.checksum == local_store["checksum"]:
+            return True, f"Vectorstore for student: {student_name} already loaded", index
+
+        with _student_indexes_lock:
+            index = _student_indexes.get(student_name)
+            if index is None or index.checksum != local_store["checksum"]:
+                try:
+                    index = StudentVectorIndex(local_store["directory"], checksum=local_store["checksum"], version=local_store["version"])
+                except Exception as e:
+                    message = f"Error loading vectorstore for student: {student_name}: {str(e)}"
+                    backend_logger.error(f"get_student_index | {message}")
+                    return False, message, None
+                _student_indexes[student_name] = index
+                cache.refresh_size(student_name)
+
+    message = f"Loaded vectorstore for student: {student_name} (version {index.version}) with {len(index)} chunks"
+    backend_logger.info(f"get_student_index | {message}")
+    return True, message, index
+
+get_vectorstore_cache().add_eviction_listener(unload_student_index)
+
+# Function to embed a question into an L2-normalized float32 vector comparable with the stored embeddings.
+def embed_query(question: str) -> np.ndarray:
+    vector = np.asarray(get_embeddings_model().embed_query(question), dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# Function to retrieve the chunks of a student's background most relevant to a question.
+def retrieve_context(student_name: str, question: str, k: int = RAG_MAX_DOC_RETRIEVE) -> Tuple[bool, str, List[str]]:
+    success = False
+    message = ""
+    data = []
+    try:
+        index_success, index_message, index = get_student_index(student_name)
+        if not index_success:
+            return success, index_message, data
+
+        results, embedding_skipped = index.hybrid_search(question, embed_query, k)
+        data = [index.texts[position] for position, _ in results]
+        success = True
+        message = f"Retrieved {len(data)} chunks for student: {student_name}" + (" (lexical match, query embedding skipped)" if embedding_skipped else "")
+        backend_logger.info(f"retrieve_context | {message}")
+    except Exception as e:
+        message = f"Error retrieving context for student: {student_name}: {str(e)}"
+        backend_logger.error(f"retrieve_context | {message}")
+    return success, message, data
+
+# Function to normalize a question for cache lookups: lowercase words only, single-spaced.
+def normalize_question(question: str) -> str:
+    return " ".join(re.findall(r"\w+", question.lower()))
+
+# Function to measure how similar two normalized questions are (Jaccard similarity of their words).
+def get_question_similarity(first: str, second: str) -> float:
+    first_words, second_words = set(first.split()), set(second.split())
+    if not first_words or not second_words:
+        return 0.0
+    return len(first_words & second_words) / len(first_words | second_words)
+
+# Function to retrieve context through the result cache. Identical questions to the same student and store version
+# are served from an LRU cache, and a follow-up nearly identical to the previous turn of the same chat session reuses that turn's chunks.
+def retrieve_context_cached(student_name: str, question: str, global_session_id: str = None, k: int = RAG_MAX_DOC_RETRIEVE) -> Tuple[bool, str, List[str]]:
+    index_success, index_message, index = get_student_index(student_name)
+    if not index_success:
+        return False, index_message, []
+
+    normalized_question = normalize_question(question)
+    key = (student_name, index.version, f"{k}:{normalized_question}")
+    increment_metric("retrieval_cache.total")
+
+    with _retrieval_cache_lock:
+        chunks = _retrieval_cache.get(key)
+        if chunks is not None:
+            _retrieval_cache.move_to_end(key)
+        elif global_session_id in _previous_session_retrievals:
+            previous_student_name, previous_version, previous_question, previous_chunks = _previous_session_retrievals[global_session_id]
+            if (previous_student_name, previous_version) == (student_name, index.version) and get_question_similarity(previous_question, normalized_question) >= RAG_FOLLOW_UP_REUSE_SIMILARITY:
+                chunks = previous_chunks
+
+    if chunks is not None:
+        increment_metric("retrieval_cache.hits")
+        message = f"Served {len(chunks)} cached chunks for student: {student_name}"
+        backend_logger.info(f"retrieve_context_cached | {message}")
+    else:
+        retrieve_success, message, chunks = retrieve_context(student_name, question, k)
+        if not retrieve_success:
+            return False, message, []
+
+    with _retrieval_cache_lock:
+        if RAG_RESULT_CACHE_SIZE:
+            _retrieval_cache[key] = chunks
+            _retrieval_cache.move_to_end(key)
+            while len(_retrieval_cache) > RAG_RESULT_CACHE_SIZE:
+                _retrieval_cache.popitem(last=False)
+        if global_session_id:
+            _previous_session_retrievals[global_session_id] = (student_name, index.version, normalized_question, chunks)
+            _previous_session_retrievals.move_to_end(global_session_id)
+            while len(_previous_session_retrievals) > max(RAG_RESULT_CACHE_SIZE, 1):
+                _previous_session_retrievals.popitem(last=False)
+
+    return True, message, chunks
+
+# Function to get the persona card of a student and the chunks retrieved for a question.
+# When the student has a persona card, the card carries the core facts and only RAG_MAX_DOC_RETRIEVE_WITH_PERSONA_CARD chunks
+# are retrieved for details it leaves out; without one, retrieval falls back to RAG_MAX_DOC_RETRIEVE chunks.
+def retrieve_persona_context(student_name: str, question: str, global_session_id: str = None) -> Tuple[bool, str, Dict]:
+    index_success, index_message, index = get_student_index(student_name)
+    if not index_success:
+        return False, index_message, {}
+
+    k = RAG_MAX_DOC_RETRIEVE_WITH_PERSONA_CARD if index.persona_card else RAG_MAX_DOC_RETRIEVE
+    chunks = []
+    message = f"Persona card alone for student: {student_name}"
+    if k > 0:
+        retrieve_success, message, chunks = retrieve_context_cached(student_name, question, global_session_id, k)
+        if not retrieve_success:
+            return False, message, {}
+    return True, message, {"persona_card": index.persona_card, "chunks": chunks}
+
+# Function to join retrieved chunks into the {context} block of SYSTEM_PROMPT_MAIN.
+def format_context(chunks: List[str]) -> str:
+    return "\n\n".join(chunks)
+
+if __name__ == "__main__":
+    pass
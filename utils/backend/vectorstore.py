@@ -0,0 +1,284 @@
+import hashlib
+import json
+import numpy as np
+import os
+
+from config.backend.s3 import (
+    MAIN_S3_BUCKET_NAME,
+    STUDENT_VECTORSTORE_FOLDER_PATH,
+    STUDENT_VECTORSTORE_MANIFEST_FILE_NAME
+)
+from config.backend.vectorstore import (
+    DOCUMENT_EMBEDDING_BATCH_SIZE,
+    DOCUMENT_EMBEDDING_MODEL_ID
+)
+from config.shared.timezone import get_current_timestamp
+from botocore.exceptions import ClientError
+from langchain_aws import BedrockEmbeddings
+from tempfile import TemporaryDirectory
+from utils.backend.all import get_aws_client
+from utils.backend.lexical import build_lexical_index
+from utils.backend.persona import build_persona_card
+from utils.shared.logger import backend_logger
+from typing import Dict, List, Optional, Tuple
+
+# Version of the on-disk vectorstore layout, bumped whenever the artifact files change shape.
+VECTORSTORE_FORMAT_VERSION = 3
+
+# Files that make up a single student's vectorstore artifact.
+VECTORSTORE_EMBEDDINGS_FILE_NAME = "embeddings.npy"
+VECTORSTORE_METADATA_FILE_NAME = "metadata.json"
+VECTORSTORE_LEXICAL_FILE_NAME = "lexical.json"
+VECTORSTORE_PERSONA_FILE_NAME = "persona.json"
+# Every build writes all of them, but stores built before the lexical index and persona cards were introduced only have the
+# required files, and are served with vector-only retrieval and without a persona card.
+VECTORSTORE_REQUIRED_FILE_NAMES = [VECTORSTORE_EMBEDDINGS_FILE_NAME, VECTORSTORE_METADATA_FILE_NAME]
+VECTORSTORE_OPTIONAL_FILE_NAMES = [VECTORSTORE_LEXICAL_FILE_NAME, VECTORSTORE_PERSONA_FILE_NAME]
+VECTORSTORE_FILE_NAMES = VECTORSTORE_REQUIRED_FILE_NAMES + VECTORSTORE_OPTIONAL_FILE_NAMES
+
+# Function to get the S3 key of a file inside a student's vectorstore folder.
+def get_vectorstore_s3_key(student_name: str, file_name: str) -> str:
+    return f"{STUDENT_VECTORSTORE_FOLDER_PATH}/{student_name}/{file_name}"
+
+# Function to get the S3 key of the vectorstore manifest.
+def get_vectorstore_manifest_s3_key() -> str:
+    return f"{STUDENT_VECTORSTORE_FOLDER_PATH}/{STUDENT_VECTORSTORE_MANIFEST_FILE_NAME}"
+
+# Function to get the embeddings model used for student documents.
+def get_embeddings_model() -> BedrockEmbeddings:
+    return BedrockEmbeddings(model_id=DOCUMENT_EMBEDDING_MODEL_ID, client=get_aws_client('bedrock-runtime'))
+
+# Function to embed texts in batches and return an L2-normalized float32 matrix.
+def embed_in_batches(texts: List[str], batch_size: int = DOCUMENT_EMBEDDING_BATCH_SIZE) -> np.ndarray:
+    embeddings_model = get_embeddings_model()
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(embeddings_model.embed_documents(texts[start:start + batch_size]))
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+# Function to compute the content hash of a chunk, which keys its embedding across builds.
+def get_chunk_content_hash(text: str) -> str:
+    return hashlib.sha256(f"{DOCUMENT_EMBEDDING_MODEL_ID}\n{text}".encode('utf-8')).hexdigest()
+
+# Function to download a student's previous vectorstore artifact from S3 and map chunk content hashes to their embeddings.
+def load_previous_embeddings(student_name: str, directory: str) -> Dict[str, np.ndarray]:
+    try:
+        s3_client = get_aws_client('s3')
+        os.makedirs(directory, exist_ok=True)
+        for file_name in [VECTORSTORE_EMBEDDINGS_FILE_NAME, VECTORSTORE_METADATA_FILE_NAME]:
+            s3_client.download_file(
+                Bucket=MAIN_S3_BUCKET_NAME,
+                Key=get_vectorstore_s3_key(student_name, file_name),
+                Filename=os.path.join(directory, file_name)
+            )
+        with open(os.path.join(directory, VECTORSTORE_METADATA_FILE_NAME), "r", encoding="utf-8") as file:
+            metadata = json.load(file)
+        if metadata.get("embedding_model_id") != DOCUMENT_EMBEDDING_MODEL_ID:
+            backend_logger.info(f"load_previous_embeddings | Embedding model changed for student: {student_name}, re-embedding all chunks")
+            return {}
+        embeddings = np.load(os.path.join(directory, VECTORSTORE_EMBEDDINGS_FILE_NAME), allow_pickle=False)
+        return {
+            chunk["content_hash"]: embeddings[index]
+            for index, chunk in enumerate(metadata.get("chunks", []))
+            if "content_hash" in chunk
+        }
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            backend_logger.error(f"load_previous_embeddings | Error downloading previous vectorstore for student: {student_name}: {str(e)}")
+        return {}
+    except Exception as e:
+        backend_logger.error(f"load_previous_embeddings | Unexpected error reading previous vectorstore for student: {student_name}: {str(e)}")
+        return {}
+
+# Function to download the persona card of a student's previous build, if there is one.
+def load_previous_persona(student_name: str) -> Optional[Dict]:
+    try:
+        s3_client = get_aws_client('s3')
+        response = s3_client.get_object(Bucket=MAIN_S3_BUCKET_NAME, Key=get_vectorstore_s3_key(student_name, VECTORSTORE_PERSONA_FILE_NAME))
+        return json.loads(response['Body'].read().decode('utf-8'))
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+            backend_logger.error(f"load_previous_persona | Error downloading previous persona card for student: {student_name}: {str(e)}")
+        return None
+    except Exception as e:
+        backend_logger.error(f"load_previous_persona | Unexpected error reading previous persona card for student: {student_name}: {str(e)}")
+        return None
+
+# Function to embed only new or changed chunks, reusing the vectors of unchanged chunks from the previous build.
+def embed_chunks_incrementally(chunks: List[Dict], previous_embeddings: Dict[str, np.ndarray]) -> Tuple[np.ndarray, int]:
+    missing_indices = [index for index, chunk in enumerate(chunks) if chunk["content_hash"] not in previous_embeddings]
+    new_embeddings = embed_in_batches([chunks[index]["text"] for index in missing_indices]) if missing_indices else None
+
+    dimension = new_embeddings.shape[1] if new_embeddings is not None else len(next(iter(previous_embeddings.values())))
+    embeddings = np.empty((len(chunks), dimension), dtype=np.float32)
+    new_rows = dict(zip(missing_indices, range(len(missing_indices))))
+    for index, chunk in enumerate(chunks):
+        if index in new_rows:
+            embeddings[index] = new_embeddings[new_rows[index]]
+        else:
+            embeddings[index] = previous_embeddings[chunk["content_hash"]]
+    return embeddings, len(missing_indices)
+
+# Function to compute the SHA-256 checksum of a file.
+def get_file_checksum(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Function to compute the checksum of a whole vectorstore artifact from its per-file checksums.
+def get_vectorstore_checksum(file_checksums: Dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    for file_name in sorted(file_checksums):
+        digest.update(f"{file_name}:{file_checksums[file_name]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+# Function to write a student's vectorstore artifact (embedding matrix, chunk metadata, BM25 inverted index and persona card) to a local directory.
+def write_student_vectorstore(directory: str, student_name: str, chunks: List[Dict], embeddings: np.ndarray, persona: Dict) -> Dict[str, str]:
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, VECTORSTORE_EMBEDDINGS_FILE_NAME), embeddings.astype(np.float32), allow_pickle=False)
+
+    metadata = {
+        "format_version": VECTORSTORE_FORMAT_VERSION,
+        "student_name": student_name,
+        "embedding_model_id": DOCUMENT_EMBEDDING_MODEL_ID,
+        "dimension": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+        "chunks": chunks
+    }
+    with open(os.path.join(directory, VECTORSTORE_METADATA_FILE_NAME), "w", encoding="utf-8") as file:
+        json.dump(metadata, file, ensure_ascii=False, separators=(",", ":"))
+
+    with open(os.path.join(directory, VECTORSTORE_LEXICAL_FILE_NAME), "w", encoding="utf-8") as file:
+        json.dump(build_lexical_index([chunk["text"] for chunk in chunks]), file, ensure_ascii=False, separators=(",", ":"))
+
+    with open(os.path.join(directory, VECTORSTORE_PERSONA_FILE_NAME), "w", encoding="utf-8") as file:
+        json.dump(persona, file, ensure_ascii=False, separators=(",", ":"))
+
+    return {file_name: get_file_checksum(os.path.join(directory, file_name)) for file_name in VECTORSTORE_FILE_NAMES}
+
+# Function to upload a student's vectorstore artifact to S3 under STUDENT_VECTORSTORE_FOLDER_PATH.
+def upload_student_vectorstore(directory: str, student_name: str) -> Tuple[bool, str]:
+    success = False
+    message = ""
+    try:
+        s3_client = get_aws_client('s3')
+        for file_name in VECTORSTORE_FILE_NAMES:
+            s3_client.upload_file(
+                Filename=os.path.join(directory, file_name),
+                Bucket=MAIN_S3_BUCKET_NAME,
+                Key=get_vectorstore_s3_key(student_name, file_name)
+            )
+        success = True
+        message = f"Uploaded vectorstore for student: {student_name}"
+        backend_logger.info(f"upload_student_vectorstore | {message}")
+    except ClientError as e:
+        message = f"Error uploading vectorstore for student: {student_name}: {str(e)}"
+        backend_logger.error(f"upload_student_vectorstore | {message}")
+    return success, message
+
+# Function to build one student's vectorstore from its ingested chunk records: embed new or changed chunks in batches,
+# distill the persona card and upload the artifact to S3.
+def build_student_vectorstore(student_name: str, chunk_records: List[Dict]) -> Tuple[bool, str, Optional[Dict]]:
+    success = False
+    message = ""
+    data = None
+    try:
+        if not chunk_records:
+            message = f"No source document chunks found for student: {student_name}"
+            backend_logger.error(f"build_student_vectorstore | {message}")
+            return success, message, data
+
+        chunks = [
+            {"source": record["source"], "text": record["text"], "content_hash": record["content_hash"]}
+            for record in chunk_records
+        ]
+
+        with TemporaryDirectory() as directory:
+            previous_embeddings = load_previous_embeddings(student_name, os.path.join(directory, "previous"))
+            embeddings, embedded_count = embed_chunks_incrementally(chunks, previous_embeddings)
+
+            # Without a persona card the store is still usable; the chat path then falls back to retrieving RAG_MAX_DOC_RETRIEVE chunks.
+            _, _, persona = build_persona_card(student_name, chunks, load_previous_persona(student_name))
+
+            file_checksums = write_student_vectorstore(directory, student_name, chunks, embeddings, persona)
+            upload_success, upload_message = upload_student_vectorstore(directory, student_name)
+            if not upload_success:
+                return success, upload_message, data
+
+        success = True
+        message = f"Built vectorstore for student: {student_name} with {len(chunks)} chunks ({embedded_count} embedded, {len(chunks) - embedded_count} reused)"
+        data = {
+            "checksum": get_vectorstore_checksum(file_checksums),
+            "files": file_checksums,
+            "chunk_count": len(chunks),
+            "embedded_chunk_count": embedded_count,
+            "embedding_model_id": DOCUMENT_EMBEDDING_MODEL_ID,
+            "format_version": VECTORSTORE_FORMAT_VERSION,
+            "built_at": get_current_timestamp()
+        }
+        backend_logger.info(f"build_student_vectorstore | {message}")
+    except Exception as e:
+        message = f"Unexpected error building vectorstore for student: {student_name}: {str(e)}"
+        backend_logger.error(f"build_student_vectorstore | {message}")
+    return success, message, data
+
+# Function to load the vectorstore manifest from S3, returning an empty manifest if none exists yet.
+def load_vectorstore_manifest() -> Tuple[bool, str, Dict]:
+    success = False
+    message = ""
+    data = {"students": {}}
+    try:
+        s3_client = get_aws_client('s3')
+        response = s3_client.get_object(Bucket=MAIN_S3_BUCKET_NAME, Key=get_vectorstore_manifest_s3_key())
+        data = json.loads(response['Body'].read().decode('utf-8'))
+        success = True
+        message = f"Loaded vectorstore manifest with {len(data.get('students', {}))} students"
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            success = True
+            message = "Vectorstore manifest does not exist yet"
+        else:
+            message = f"Error loading vectorstore manifest: {str(e)}"
+            backend_logger.error(f"load_vectorstore_manifest | {message}")
+    except Exception as e:
+        message = f"Unexpected error loading vectorstore manifest: {str(e)}"
+        backend_logger.error(f"load_vectorstore_manifest | {message}")
+    return success, message, data
+
+# Function to save the vectorstore manifest to S3.
+def save_vectorstore_manifest(manifest: Dict) -> Tuple[bool, str]:
+    success = False
+    message = ""
+    try:
+        s3_client = get_aws_client('s3')
+        s3_client.put_object(
+            Bucket=MAIN_S3_BUCKET_NAME,
+            Key=get_vectorstore_manifest_s3_key(),
+            Body=json.dumps(manifest, indent=2).encode('utf-8'),
+            ContentType="application/json"
+        )
+        success = True
+        message = f"Saved vectorstore manifest with {len(manifest.get('students', {}))} students"
+        backend_logger.info(f"save_vectorstore_manifest | {message}")
+    except ClientError as e:
+        message = f"Error saving vectorstore manifest: {str(e)}"
+        backend_logger.error(f"save_vectorstore_manifest | {message}")
+    return success, message
+
+# Function to record a freshly built student vectorstore in the manifest, bumping its version only when the checksum changed.
+def update_manifest_entry(manifest: Dict, student_name: str, build_data: Dict) -> Dict:
+    students = manifest.setdefault("students", {})
+    previous_entry = students.get(student_name, {})
+    version = previous_entry.get("version", 0)
+    if previous_entry.get("checksum") != build_data["checksum"]:
+        version += 1
+    students[student_name] = {**build_data, "version": version}
+    manifest["updated_at"] = get_current_timestamp()
+    return manifest
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,252 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+from config.backend.s3 import MAIN_S3_BUCKET_NAME
+from config.backend.vectorstore import (
+    LOCAL_VECTORSTORES_DIRECTORY,
+    LOCAL_VECTORSTORES_MAX_BYTES,
+    VECTORSTORE_MANIFEST_REFRESH_SECONDS
+)
+from botocore.exceptions import ClientError
+from contextlib import contextmanager
+from uuid import uuid4
+from utils.backend.all import get_aws_client
+from utils.backend.vectorstore import (
+    VECTORSTORE_FILE_NAMES,
+    VECTORSTORE_OPTIONAL_FILE_NAMES,
+    VECTORSTORE_REQUIRED_FILE_NAMES,
+    get_vectorstore_s3_key,
+    load_vectorstore_manifest
+)
+from utils.shared.logger import backend_logger
+from typing import Callable, Dict, List, Optional, Tuple
+
+# File written next to a downloaded store recording which manifest checksum and version it holds.
+CACHE_STATE_FILE_NAME = ".cache-state.json"
+
+# Leftover download and stale directories are only removed at startup once they are this old, since another process
+# sharing the directory may still be writing or removing them.
+ABANDONED_DIRECTORY_SECONDS = 3600
+
+# Manages the per-student vectorstores in LOCAL_VECTORSTORES_DIRECTORY: tracks their size and last access,
+# re-downloads a store only when its S3 manifest checksum changed and evicts least recently used stores over the byte budget.
+class VectorstoreCache:
+    def __init__(self, directory: str = LOCAL_VECTORSTORES_DIRECTORY, max_bytes: int = LOCAL_VECTORSTORES_MAX_BYTES, manifest_refresh_seconds: int = VECTORSTORE_MANIFEST_REFRESH_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.manifest_refresh_seconds = manifest_refresh_seconds
+        self.entries: Dict[str, Dict] = {}
+        self.manifest: Dict = {"students": {}}
+        self.manifest_loaded_at: Optional[float] = None
+        self.eviction_listeners: List[Callable[[str], None]] = []
+        self.lock = threading.Lock()
+        self.manifest_lock = threading.Lock()
+        self.student_locks: Dict[str, threading.Lock] = {}
+        self.pins: Dict[str, int] = {}
+        os.makedirs(self.directory, exist_ok=True)
+        self.scan()
+
+    # Rebuild the size and last-access bookkeeping from what is already on disk.
+    def scan(self):
+        for student_name in os.listdir(self.directory):
+            if ".download-" in student_name or ".stale-" in student_name:
+                path = os.path.join(self.directory, student_name)
+                try:
+                    if time.time() - os.path.getmtime(path) > ABANDONED_DIRECTORY_SECONDS:
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    pass
+                continue
+            state = self.read_state(student_name)
+            if state is None:
+                continue
+            state_path = os.path.join(self.get_student_directory(student_name), CACHE_STATE_FILE_NAME)
+            self.entries[student_name] = {
+                **state,
+                "size": self.get_directory_size(student_name),
+                "last_access": os.path.getmtime(state_path)
+            }
+
+    def get_student_directory(self, student_name: str) -> str:
+        return os.path.join(self.directory, student_name)
+
+    def get_directory_size(self, student_name: str) -> int:
+        directory = self.get_student_directory(student_name)
+        return sum(os.path.getsize(os.path.join(directory, file_name)) for file_name in os.listdir(directory))
+
+    def read_state(self, student_name: str) -> Optional[Dict]:
+        directory = self.get_student_directory(student_name)
+        if not all(os.path.exists(os.path.join(directory, file_name)) for file_name in VECTORSTORE_REQUIRED_FILE_NAMES):
+            return None
+        try:
+            with open(os.path.join(directory, CACHE_STATE_FILE_NAME), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def get_student_lock(self, student_name: str) -> threading.Lock:
+        with self.lock:
+            return self.student_locks.setdefault(student_name, threading.Lock())
+
+    # Keep a student's store on disk for the duration of the block: evict() skips pinned stores, so a caller can open the
+    # directory returned by ensure() without it being removed underneath.
+    @contextmanager
+    def pin(self, student_name: str):
+        with self.lock:
+            self.pins[student_name] = self.pins.get(student_name, 0) + 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.pins[student_name] -= 1
+                if not self.pins[student_name]:
+                    del self.pins[student_name]
+
+    # Register a callback invoked with the student name whenever a local store is evicted or replaced.
+    def add_eviction_listener(self, listener: Callable[[str], None]):
+        self.eviction_listeners.append(listener)
+
+    def notify_eviction(self, student_name: str):
+        for listener in self.eviction_listeners:
+            listener(student_name)
+
+    # Get the manifest entry of a student, re-reading the manifest from S3 when it is older than the refresh interval.
+    def get_manifest_entry(self, student_name: str) -> Optional[Dict]:
+        now = time.monotonic()
+        if self.manifest_loaded_at is None or now - self.manifest_loaded_at >= self.manifest_refresh_seconds:
+            with self.manifest_lock:
+                if self.manifest_loaded_at is None or now - self.manifest_loaded_at >= self.manifest_refresh_seconds:
+                    manifest_success, manifest_message, manifest = load_vectorstore_manifest()
+                    if manifest_success:
+                        self.manifest = manifest
+                    else:
+                        backend_logger.error(f"VectorstoreCache.get_manifest_entry | Keeping previous manifest: {manifest_message}")
+                    self.manifest_loaded_at = time.monotonic()
+        return self.manifest.get("students", {}).get(student_name)
+
+    # Download a student's store into a fresh directory and swap it in place of the previous copy.
+    def download(self, student_name: str, manifest_entry: Optional[Dict]) -> Tuple[bool, str, Optional[Dict]]:
+        student_directory = self.get_student_directory(student_name)
+        download_directory = f"{student_directory}.download-{uuid4().hex}"
+        try:
+            s3_client = get_aws_client('s3')
+            os.makedirs(download_directory)
+            for file_name in VECTORSTORE_FILE_NAMES:
+                try:
+                    s3_client.download_file(
+                        Bucket=MAIN_S3_BUCKET_NAME,
+                        Key=get_vectorstore_s3_key(student_name, file_name),
+                        Filename=os.path.join(download_directory, file_name)
+                    )
+                except ClientError as e:
+                    if file_name not in VECTORSTORE_OPTIONAL_FILE_NAMES or e.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+                        raise
+                    backend_logger.info(f"VectorstoreCache.download | No {file_name} in the vectorstore of student: {student_name}, built before it was introduced")
+            state = {
+                "checksum": manifest_entry.get("checksum") if manifest_entry else None,
+                "version": manifest_entry.get("version") if manifest_entry else None
+            }
+            with open(os.path.join(download_directory, CACHE_STATE_FILE_NAME), "w", encoding="utf-8") as file:
+                json.dump(state, file)
+
+            # Open memory maps keep reading the old files after they are unlinked, so the swap is safe under concurrent queries.
+            if os.path.exists(student_directory):
+                stale_directory = f"{student_directory}.stale-{uuid4().hex}"
+                os.rename(student_directory, stale_directory)
+                shutil.rmtree(stale_directory, ignore_errors=True)
+            os.rename(download_directory, student_directory)
+        except (ClientError, OSError) as e:
+            shutil.rmtree(download_directory, ignore_errors=True)
+            message = f"Error downloading vectorstore for student: {student_name}: {str(e)}"
+            backend_logger.error(f"VectorstoreCache.download | {message}")
+            return False, message, None
+
+        with self.lock:
+            self.entries[student_name] = {**state, "size": self.get_directory_size(student_name), "last_access": time.time()}
+        message = f"Downloaded vectorstore for student: {student_name} (version {state['version']})"
+        backend_logger.info(f"VectorstoreCache.download | {message}")
+        return True, message, state
+
+    # Make sure an up-to-date copy of a student's store is on local disk and return its directory, checksum and version.
+    # Concurrent callers for the same student wait on a per-student lock, so a missing or stale store is downloaded exactly once.
+    def ensure(self, student_name: str) -> Tuple[bool, str, Optional[Dict]]:
+        manifest_entry = self.get_manifest_entry(student_name)
+        expected_checksum = manifest_entry.get("checksum") if manifest_entry else None
+
+        entry = self.entries.get(student_name)
+        if entry is None or (expected_checksum is not None and entry.get("checksum") != expected_checksum):
+            with self.get_student_lock(student_name):
+                entry = self.entries.get(student_name)
+                if entry is None or (expected_checksum is not None and entry.get("checksum") != expected_checksum):
+                    replacing = entry is not None
+                    download_success, download_message, _ = self.download(student_name, manifest_entry)
+                    if not download_success:
+                        if entry is None:
+                            return False, download_message, None
+                        backend_logger.error(f"VectorstoreCache.ensure | Serving stale vectorstore for student: {student_name}")
+                    elif replacing:
+                        self.notify_eviction(student_name)
+                    entry = self.entries[student_name]
+            self.evict(keep=student_name)
+
+        entry["last_access"] = time.time()
+        data = {
+            "directory": self.get_student_directory(student_name),
+            "checksum": entry.get("checksum"),
+            "version": entry.get("version")
+        }
+        return True, f"Vectorstore for student: {student_name} is available locally", data
+
+    # Re-measure a store after files were derived from it locally (e.g. quantized indexes).
+    def refresh_size(self, student_name: str):
+        with self.lock:
+            entry = self.entries.get(student_name)
+            if entry is not None and os.path.isdir(self.get_student_directory(student_name)):
+                entry["size"] = self.get_directory_size(student_name)
+
+    # Evict least recently used stores until the directory fits the byte budget. Stores being downloaded or pinned are skipped.
+    def evict(self, keep: Optional[str] = None):
+        with self.lock:
+            total_size = sum(entry["size"] for entry in self.entries.values())
+            if total_size <= self.max_bytes:
+                return
+            candidates = sorted(
+                (student_name for student_name in self.entries if student_name != keep),
+                key=lambda student_name: self.entries[student_name]["last_access"]
+            )
+
+        for student_name in candidates:
+            if total_size <= self.max_bytes:
+                break
+            student_lock = self.get_student_lock(student_name)
+            if not student_lock.acquire(blocking=False):
+                continue
+            try:
+                with self.lock:
+                    entry = self.entries.pop(student_name, None) if not self.pins.get(student_name) else None
+                if entry is None:
+                    continue
+                shutil.rmtree(self.get_student_directory(student_name), ignore_errors=True)
+                total_size -= entry["size"]
+                backend_logger.info(f"VectorstoreCache.evict | Evicted vectorstore for student: {student_name} ({entry['size']} bytes)")
+            finally:
+                student_lock.release()
+            self.notify_eviction(student_name)
+
+_vectorstore_cache: Optional[VectorstoreCache] = None
+_vectorstore_cache_lock = threading.Lock()
+
+# Function to get the process-wide vectorstore cache.
+def get_vectorstore_cache() -> VectorstoreCache:
+    global _vectorstore_cache
+    if _vectorstore_cache is None:
+        with _vectorstore_cache_lock:
+            if _vectorstore_cache is None:
+                _vectorstore_cache = VectorstoreCache()
+    return _vectorstore_cache
+
+if __name__ == "__main__":
+    pass
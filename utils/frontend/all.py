@@ -2,13 +2,19 @@ import ast
 import os
 import re
 import streamlit as st
+import threading
+import time
 
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config.frontend.api_calls import BACKEND_API_TIMEOUT_SECONDS
 from config.frontend.llm import (
     QUESTIONS_GENERATION_MODEL_ID,
     QUESTIONS_GENERATION_MODEL_TEMPERATURE,
     QUESTIONS_GENERATION_MODEL_MAX_TOKENS
 )
 from config.frontend.other import (
+    ANSWER_SPECULATION_ENABLED,
     APP_LOGO_URL,
     DEFAULT_PROFILE_IMAGE_URL,
     STUDENT_IMAGE_URL
@@ -19,9 +25,16 @@ from utils.frontend.api_calls import (
     start_chat,
     get_active_sessions,
     get_chat_history_messages,
-    end_all_chats
+    end_all_chats,
+    get_idempotency_key,
+    speculate_answers,
+    update_session_snapshot
 )
 from langchain_aws.chat_models import ChatBedrock
+from utils.frontend.chat_message import ChatMessage
+from utils.frontend.history_prefetch import get_history_prefetcher
+from utils.frontend.llm_governor import get_llm_governor
+from utils.frontend.session_registry import get_chat_session_registry
 from prompts.frontend import SYSTEM_PROMPT_GENERATE_NEXT_QUESTIONS
 from urllib.parse import urlparse
 from utils.shared.errors import get_user_error
@@ -30,6 +43,18 @@ from utils.shared.translate import translate_text
 from utils.shared.other import formatted
 from uuid import uuid4
 
+# Chat sessions whose /start-chat call is still persisting the session and greeting in the background, by chat session id,
+# with the arguments of the call so that a failed start can be submitted again.
+_pending_chat_starts: dict[str, tuple[Future, dict]] = {}
+_pending_chat_starts_lock = threading.Lock()
+_chat_start_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="chat-start")
+# Loads the history of resumed chat sessions while the chat page already renders their snapshot.
+_history_load_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="history-load")
+# Sends the suggested next questions to /speculate-answers once the chat session is persisted.
+_answer_speculation_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="answer-speculation")
+# Stores the resume snapshots of chat sessions without blocking the page.
+_session_snapshot_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="session-snapshot")
+
 # Function to configure Streamlit page settings.
 def setup_page(
         page_title="Agastya Connect",
@@ -60,7 +85,71 @@ def generate_uuid():
     frontend_logger.info(f"Generated UUID: {new_uuid}")
     return new_uuid
 
+# Function to get the greeting of a student, identical to the first assistant message written by /start-chat.
+def get_first_assistant_message(student_name: str) -> str:
+    return f"Hi, I'm {formatted(student_name).split()[0]} from Agastya International Foundation. What would you like to know about me?"
+
+# Function to persist a chat session and its greeting with /start-chat, retrying once with the same idempotency key.
+def persist_chat_start(**kwargs) -> tuple[bool, str, str]:
+    for _ in range(2):
+        success, message, data = start_chat(**kwargs)
+        if success:
+            break
+    return success, message, data
+
+# Function to submit the /start-chat call of a chat session and track it until it succeeds.
+# A successful start is dropped as soon as it completes, so chats that are never continued do not keep their finished call.
+# Failed starts are kept for wait_for_chat_start to retry: a retry only replaces the failed start it was given,
+# so concurrent waiters on the same failure submit it once.
+def submit_chat_start(chat_session_id: str, chat_start: dict, failed_chat_start: tuple[Future, dict] | None = None) -> None:
+    with _pending_chat_starts_lock:
+        if failed_chat_start is not None and _pending_chat_starts.get(chat_session_id) is not failed_chat_start:
+            return
+        future = _chat_start_executor.submit(persist_chat_start, **chat_start)
+        pending_chat_start = (future, chat_start)
+        _pending_chat_starts[chat_session_id] = pending_chat_start
+
+    def drop_if_persisted(done_future: Future):
+        if done_future.exception() is None and done_future.result()[0]:
+            with _pending_chat_starts_lock:
+                if _pending_chat_starts.get(chat_session_id) is pending_chat_start:
+                    del _pending_chat_starts[chat_session_id]
+
+    future.add_done_callback(drop_if_persisted)
+
+# Function to persist a new chat session and its greeting in the background.
+def start_chat_in_background(user_first_name: str, user_last_name: str, user_email: str, login_session_id: str, chat_session_id: str, student_name: str) -> None:
+    chat_start = {
+        "user_first_name": user_first_name,
+        "user_last_name": user_last_name,
+        "user_email": user_email,
+        "login_session_id": login_session_id,
+        "chat_session_id": chat_session_id,
+        "student_name": student_name,
+        "idempotency_key": get_idempotency_key("start-chat", login_session_id, chat_session_id)
+    }
+    submit_chat_start(chat_session_id, chat_start)
+
+# Function to wait until a chat session started in the background is persisted. Returns immediately once it is.
+# A failed start is submitted again with the same idempotency key, so the next turn of the chat waits on the retry
+# instead of failing on the same result.
+def wait_for_chat_start(chat_session_id: str) -> tuple[bool, str]:
+    with _pending_chat_starts_lock:
+        pending_chat_start = _pending_chat_starts.get(chat_session_id)
+    if pending_chat_start is None:
+        return True, "Chat session already persisted"
+
+    future, chat_start = pending_chat_start
+    success, message, _ = future.result()
+    if not success:
+        submit_chat_start(chat_session_id, chat_start, failed_chat_start=pending_chat_start)
+        frontend_logger.error(f"wait_for_chat_start | start_chat failed, retrying in the background: {message}")
+    return success, message
+
 # Function to initialize or resume a chat session in Streamlit session state.
+# A new session enters the chat page right away with the greeting; the session is persisted in the background
+# and the suggested questions are generated by the chat page. A resumed session enters it right away with the snapshot
+# of its session item (suggested questions and history summary) while its history is loaded in the background.
 async def initialize_chat_session(student_choice: dict):
     if "active_chat_session" not in st.session_state:
         st.session_state["active_chat_session"] = {
@@ -91,23 +180,21 @@ async def initialize_chat_session(student_choice: dict):
     if is_resuming:
         frontend_logger.info(f"initialize_chat_session | Resuming chat with {student_name}, session id: {chat_session_id}")
         
-        history_success, history_message, formatted_history = get_chat_history_formatted(
-            login_session_id=login_session_id,
-            chat_session_id=chat_session_id,
-            user_avatar=user_avatar,
-            student_avatar=student_avatar
-        )
-        
-        if not history_success:
-            frontend_logger.error(f"initialize_chat_session | Failed to get chat history: {history_message}")
-            st.error(get_user_error())
-            st.stop()
-            
-        st.session_state["active_chat_session"]["chat_history"] = formatted_history
-    else:
+        history_future = get_history_prefetcher().take(login_session_id=login_session_id, chat_session_id=chat_session_id)
+        if history_future is None:
+            history_future = _history_load_executor.submit(
+                get_chat_history_formatted,
+                login_session_id=login_session_id,
+                chat_session_id=chat_session_id,
+                user_avatar=user_avatar,
+                student_avatar=student_avatar
+            )
         st.session_state["active_chat_session"]["chat_history"] = []
-        
-        start_chat_success, start_chat_message, first_message = start_chat(
+        st.session_state["active_chat_session"]["history_future"] = history_future
+        st.session_state["active_chat_session"]["history_requested_at"] = time.monotonic()
+        start_answer_speculation(chat_session_id=chat_session_id, next_questions=st.session_state["active_chat_session"]["next_questions"], student_name=student_name)
+    else:
+        start_chat_in_background(
             user_first_name=user_first_name,
             user_last_name=user_last_name,
             user_email=user_email,
@@ -116,22 +203,14 @@ async def initialize_chat_session(student_choice: dict):
             chat_session_id=chat_session_id
         )
 
-        if not start_chat_success:
-            frontend_logger.error(f"initialize_chat_session | start_chat failed: {start_chat_message}")
-            st.error(get_user_error())
-            st.stop()
-
-        st.session_state["active_chat_session"]["chat_history"].append({
-            "role": "assistant", 
-            "content": first_message,
-            "content-en": first_message,
-            "avatar": student_avatar
-        })
-
-    st.session_state["active_chat_session"]["next_questions"] = await generate_next_questions(
-        chat_history=st.session_state["active_chat_session"]["chat_history"],
-        student_name=student_name
-    )
+        first_message = get_first_assistant_message(student_name)
+        st.session_state["active_chat_session"]["chat_history"] = [ChatMessage(
+            role="assistant",
+            content=first_message,
+            content_en=first_message,
+            avatar=student_avatar
+        )]
+        st.session_state["active_chat_session"]["next_questions"] = None
 
 # Function to retrieve chat history from the backend and format it for UI display.
 def get_chat_history_formatted(login_session_id: str, chat_session_id: str, user_avatar: str, student_avatar: str) -> tuple[bool, str, list]:
@@ -154,12 +233,12 @@ def get_chat_history_formatted(login_session_id: str, chat_session_id: str, user
             content = msg.get("content")
             avatar = user_avatar if role == "user" else student_avatar
             
-            data.append({
-                "role": role,
-                "content": content,
-                "content-en": content,
-                "avatar": avatar
-            })
+            data.append(ChatMessage(
+                role=role,
+                content=content,
+                content_en=content,
+                avatar=avatar
+            ))
             
         success = True
         message = "Retrieved and formatted chat history"
@@ -169,6 +248,71 @@ def get_chat_history_formatted(login_session_id: str, chat_session_id: str, user
         frontend_logger.error(f"get_chat_history_formatted | Error: {str(e)}")
     return success, message, data
 
+# Function to start prefetching the histories of the resumable chat sessions listed on the students page.
+def prefetch_chat_histories(active_sessions: list):
+    login_session_id = getattr(st.user, "nonce")
+    user_avatar = getattr(st.user, "picture", DEFAULT_PROFILE_IMAGE_URL.format(domain=urlparse(st.context.url).netloc))
+    for session in active_sessions:
+        get_history_prefetcher().prefetch(
+            login_session_id=login_session_id,
+            chat_session_id=session["chat_session_id"],
+            load=get_chat_history_formatted,
+            user_avatar=user_avatar,
+            student_avatar=STUDENT_IMAGE_URL.format(domain=urlparse(st.context.url).netloc, student_name=session["student_name"])
+        )
+
+# Function to check whether the background load of a resumed session's history is overdue. Each request of the load times out
+# after BACKEND_API_TIMEOUT_SECONDS, so a load still pending past that is stuck behind other loads and is better done directly.
+def is_history_load_overdue(current_chat_session: dict) -> bool:
+    return time.monotonic() - current_chat_session.get("history_requested_at", 0) > BACKEND_API_TIMEOUT_SECONDS
+
+# Function to make the chat history of a session available and mark the session as active. It takes the history loaded in
+# the background for a resumed session, and reloads the history of a session that was trimmed while it was idle.
+# A background load that failed or is overdue is replaced by a direct load. Returns False while the history of a resumed session is still loading.
+def ensure_chat_history_loaded(current_chat_session: dict, student_avatar: str) -> bool:
+    history_future = current_chat_session.get("history_future")
+    if history_future is not None:
+        if not history_future.done() and not is_history_load_overdue(current_chat_session):
+            return False
+        current_chat_session.pop("history_future", None)
+
+        if not history_future.done():
+            history_future.cancel()
+            frontend_logger.warning(f"ensure_chat_history_loaded | Background history load overdue, loading it directly for session id: {current_chat_session['id']}")
+            current_chat_session["history_trimmed"] = True
+        else:
+            history_success, history_message, formatted_history = history_future.result()
+
+            if not history_success:
+                # The next run of the page loads the history again instead of rendering an empty chat.
+                current_chat_session["history_trimmed"] = True
+                frontend_logger.error(f"ensure_chat_history_loaded | Failed to get chat history: {history_message}")
+                st.error(get_user_error())
+                st.stop()
+
+            current_chat_session["chat_history"] = formatted_history
+            current_chat_session["history_trimmed"] = False
+
+    if current_chat_session.get("history_trimmed"):
+        frontend_logger.info(f"ensure_chat_history_loaded | Reloading trimmed chat history for session id: {current_chat_session['id']}")
+        history_success, history_message, formatted_history = get_chat_history_formatted(
+            login_session_id=getattr(st.user, "nonce"),
+            chat_session_id=current_chat_session["id"],
+            user_avatar=getattr(st.user, "picture", DEFAULT_PROFILE_IMAGE_URL.format(domain=urlparse(st.context.url).netloc)),
+            student_avatar=student_avatar
+        )
+
+        if not history_success:
+            frontend_logger.error(f"ensure_chat_history_loaded | Failed to get chat history: {history_message}")
+            st.error(get_user_error())
+            st.stop()
+
+        current_chat_session["chat_history"] = formatted_history
+        current_chat_session["history_trimmed"] = False
+
+    get_chat_session_registry().touch(current_chat_session)
+    return True
+
 # Function to check if a string contains Kannada characters.
 def is_kannada(text: str) -> bool:
     if text is None:
@@ -218,7 +362,8 @@ async def generate_next_questions(chat_history, student_name, num_questions=4):
             student=formatted(student_name),
             formatted_history=formatted_history
         )
-        response = await llm.ainvoke(generate_next_questions_prompt)
+        async with get_llm_governor().slot(user_id=getattr(st.user, "email")):
+            response = await llm.ainvoke(generate_next_questions_prompt)
         generated_text = response.content.strip()
 
         match = re.search(r'\[.*?\]', generated_text, re.DOTALL)
@@ -230,28 +375,84 @@ async def generate_next_questions(chat_history, student_name, num_questions=4):
         frontend_logger.error(f"generate_next_questions | Error: {str(e)}")
         return []
 
-# Function to render the suggested next questions as buttons in the UI.
-async def render_next_questions(next_questions):
-    current_chat_session = st.session_state["active_chat_session"]
-    student_profile = current_chat_session["student_profile"]
-    student_name = student_profile["student_name"]
-    student_avatar = STUDENT_IMAGE_URL.format(domain=urlparse(st.context.url).netloc, student_name=student_name)
-    
-    with st.sidebar:
-        st.markdown("<br>", unsafe_allow_html=True)
-        add_text(content="You may also ask:", alignment="center", size=24, bold=True)
-        st.markdown("<br>", unsafe_allow_html=True)
-    for question in next_questions:
-        if st.sidebar.button(label=question, use_container_width=True):
-            await handle_user_input(
-                user_input=question,
-                current_chat_session=current_chat_session,
-                student_name=student_name,
-                student_avatar=student_avatar,
-                input_type="button"
-            )
+# Function to start pre-answering the suggested next questions on the backend without blocking the page.
+# Does nothing unless ANSWER_SPECULATION_ENABLED is set.
+def start_answer_speculation(chat_session_id: str, next_questions: list, student_name: str):
+    if not ANSWER_SPECULATION_ENABLED or not next_questions:
+        return
+
+    def speculate_after_chat_start(**kwargs):
+        chat_start_success, _ = wait_for_chat_start(chat_session_id)
+        if chat_start_success:
+            speculate_answers(**kwargs)
+
+    _answer_speculation_executor.submit(
+        speculate_after_chat_start,
+        login_session_id=getattr(st.user, "nonce"),
+        chat_session_id=chat_session_id,
+        questions=list(next_questions),
+        user_email=getattr(st.user, "email"),
+        user_full_name=getattr(st.user, "given_name", " ") + " " + getattr(st.user, "family_name", " "),
+        student_name=student_name
+    )
+
+# Function to get the latest turn of a chat history as shown to the instructor, or None before the first question.
+def get_latest_turn(chat_history: list) -> dict | None:
+    if len(chat_history) < 2 or chat_history[-2]["role"] != "user" or chat_history[-1]["role"] != "assistant":
+        return None
+    return {"question": chat_history[-2]["content"], "answer": chat_history[-1]["content"]}
+
+# Function to get the latest turn of a resumed chat session's snapshot as chat messages, to show while its history loads.
+def get_latest_turn_messages(current_chat_session: dict, student_avatar: str) -> list:
+    latest_turn = current_chat_session.get("latest_turn")
+    if not latest_turn or not latest_turn["answer"].strip():
+        return []
+    user_avatar = getattr(st.user, "picture", DEFAULT_PROFILE_IMAGE_URL.format(domain=urlparse(st.context.url).netloc))
+    return [
+        ChatMessage(role="user", content=latest_turn["question"], avatar=user_avatar),
+        ChatMessage(role="assistant", content=latest_turn["answer"], avatar=student_avatar)
+    ]
+
+# Function to store the suggested next questions of a chat session and its latest turn as its resume snapshot without blocking the page.
+# The session item counts the system message that get_chat_history_formatted leaves out, hence the message count of len(chat_history) + 1.
+def save_session_snapshot(chat_session_id: str, next_questions: list, chat_history: list):
+    latest_turn = get_latest_turn(chat_history)
+    if not next_questions and latest_turn is None:
+        return
+
+    def save_after_chat_start(**kwargs):
+        chat_start_success, _ = wait_for_chat_start(chat_session_id)
+        if chat_start_success:
+            update_session_snapshot(**kwargs)
+
+    _session_snapshot_executor.submit(
+        save_after_chat_start,
+        login_session_id=getattr(st.user, "nonce"),
+        chat_session_id=chat_session_id,
+        next_questions=list(next_questions or []),
+        message_count=len(chat_history) + 1,
+        latest_turn=latest_turn
+    )
+
+# Function to render the suggested next questions as buttons in the sidebar.
+# Returns the clicked question, if any; the chat page handles it like any other input with input_type="button".
+def render_next_questions(next_questions) -> str | None:
+    clicked_question = None
+    if not next_questions:
+        return clicked_question
+
+    message_count = len(st.session_state["active_chat_session"]["chat_history"])
+    st.markdown("---")
+    add_text(content="You may also ask:", alignment="center", size=24, bold=True)
+    st.markdown("<br>", unsafe_allow_html=True)
+    for index, question in enumerate(next_questions):
+        if st.button(label=question, key=f"next_question_{message_count}_{index}", use_container_width=True):
+            clicked_question = question
+    return clicked_question
 
 # Function to handle user input (manual text or button click), interact with the backend chat API, and update session state.
+# It must be called from within the live chat fragment of the chat page, which it reruns once the turn is appended.
+# The suggestions of the turn are cleared here and generated by the live chat fragment once the answer is drawn.
 async def handle_user_input(user_input: str, current_chat_session: dict, student_name: str, student_avatar: str, input_type: str):
     user_image = getattr(st.user, "picture", DEFAULT_PROFILE_IMAGE_URL.format(domain=urlparse(st.context.url).netloc))
     user_login_session_id = getattr(st.user, "nonce")
@@ -272,7 +473,13 @@ async def handle_user_input(user_input: str, current_chat_session: dict, student
         st.markdown(body=user_input)
 
     spinner_message = f"{formatted(text=student_name).split(' ')[0]} is typing..."
-    with st.spinner(spinner_message):
+    with get_chat_session_registry().turn(current_chat_session), st.spinner(spinner_message):
+        chat_start_success, chat_start_message = wait_for_chat_start(current_chat_session["id"])
+        if not chat_start_success:
+            frontend_logger.error(f"handle_user_input | Chat session could not be started: {chat_start_message}")
+            st.error(get_user_error())
+            st.stop()
+
         success, message, answer = chat(
             login_session_id=user_login_session_id,
             chat_session_id=current_chat_session["id"],
@@ -280,7 +487,8 @@ async def handle_user_input(user_input: str, current_chat_session: dict, student
             question_kannada=user_input if input_type == "manual-kannada" else None,
             input_type=input_type,
             user_full_name=user_full_name,
-            student_name=student_name
+            student_name=student_name,
+            idempotency_key=get_idempotency_key("chat", user_login_session_id, current_chat_session["id"], len(current_chat_session["chat_history"]), input_type, question_for_api)
         )
 
         if not success:
@@ -288,19 +496,10 @@ async def handle_user_input(user_input: str, current_chat_session: dict, student
             st.error(get_user_error())
             st.stop()
         
-        current_chat_session["chat_history"].append({"role": "user", "content": user_input if input_type == "manual-kannada" else question_for_api, "content-en": question_for_api, "avatar": user_image})
-        current_chat_session["chat_history"].append({"role": "assistant", "content": answer, "content-en": answer, "avatar": student_avatar})
-        
-        chat_history = current_chat_session["chat_history"]
-
-        generated_questions = await generate_next_questions(
-            chat_history=chat_history,
-            student_name=student_name,
-            num_questions=4
-        )
-
-        current_chat_session["next_questions"] = generated_questions
-        st.rerun()
+        current_chat_session["chat_history"].append(ChatMessage(role="user", content=user_input if input_type == "manual-kannada" else question_for_api, content_en=question_for_api, avatar=user_image))
+        current_chat_session["chat_history"].append(ChatMessage(role="assistant", content=answer, content_en=answer, avatar=student_avatar))
+        current_chat_session["next_questions"] = None
+        st.rerun(scope="fragment")
 
 # Function to check if the user is authenticated via Streamlit.
 def authenticated():
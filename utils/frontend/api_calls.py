@@ -3,10 +3,12 @@ import streamlit as st
 
 from config.frontend.api_calls import (
     BACKEND_API_URL,
-    BACKEND_API_KEY
+    BACKEND_API_KEY,
+    BACKEND_API_TIMEOUT_SECONDS
 )
 from utils.shared.errors import get_user_error
 from utils.shared.logger import frontend_logger
+from uuid import NAMESPACE_URL, uuid5
 
 # Backend API URL and Key loaded from Streamlit secrets.
 backend_api_url = BACKEND_API_URL
@@ -17,6 +19,15 @@ headers = {
     "X-API-Key": backend_api_key
 }
 
+# Function to derive the idempotency key of a mutating request from what identifies it, so that a Streamlit rerun or a double click
+# resending the same request reuses the same key and the backend runs it only once.
+def get_idempotency_key(*parts) -> str:
+    return str(uuid5(NAMESPACE_URL, "\n".join(str(part) for part in parts)))
+
+# Function to get the request headers, adding the Idempotency-Key header of a mutating request.
+def get_headers(idempotency_key: str | None = None) -> dict:
+    return {**headers, "Idempotency-Key": idempotency_key} if idempotency_key else headers
+
 # Function to fetch student profiles from the backend API (/get-student-profiles).
 @st.cache_resource(ttl=3600, show_spinner=False)
 def get_student_profiles(count: int) -> tuple[bool, str, list]:
@@ -50,7 +61,8 @@ def get_student_profiles(count: int) -> tuple[bool, str, list]:
     return success, message, data
 
 # Function to initialize a new chat session via the backend API (/start-chat).
-def start_chat(user_first_name: str, user_last_name: str, user_email: str, login_session_id: str, chat_session_id: str, student_name: str) -> tuple[bool, str, str]:
+# Retries with the same idempotency_key are safe: the session and greeting are only written once.
+def start_chat(user_first_name: str, user_last_name: str, user_email: str, login_session_id: str, chat_session_id: str, student_name: str, idempotency_key: str | None = None) -> tuple[bool, str, str]:
     success = False
     message = ""
     data = ""
@@ -63,7 +75,8 @@ def start_chat(user_first_name: str, user_last_name: str, user_email: str, login
             "chat_session_id": chat_session_id,
             "student_name": student_name
         }
-        response = requests.post(f"{backend_api_url}/start-chat", json=payload, headers=headers)
+        idempotency_key = idempotency_key or get_idempotency_key("start-chat", login_session_id, chat_session_id)
+        response = requests.post(f"{backend_api_url}/start-chat", json=payload, headers=get_headers(idempotency_key), timeout=BACKEND_API_TIMEOUT_SECONDS)
 
         if response.status_code == 500:
             message = get_user_error()
@@ -89,7 +102,8 @@ def start_chat(user_first_name: str, user_last_name: str, user_email: str, login
     return success, message, data
 
 # Function to send a chat message and get a response from the backend API (/chat).
-def chat(login_session_id: str, chat_session_id: str, question: str, question_kannada: str | None, input_type: str, user_full_name: str, student_name: str) -> tuple[bool, str, str]:
+# The idempotency key should identify the turn (see get_idempotency_key), so that a duplicate of the same turn is answered once.
+def chat(login_session_id: str, chat_session_id: str, question: str, question_kannada: str | None, input_type: str, user_full_name: str, student_name: str, idempotency_key: str | None = None) -> tuple[bool, str, str]:
     success = False
     message = ""
     data = ""
@@ -104,7 +118,7 @@ def chat(login_session_id: str, chat_session_id: str, question: str, question_ka
             "user_full_name": user_full_name,
             "student_name": student_name
         }
-        response = requests.post(f"{backend_api_url}/chat", json=payload, headers=headers)
+        response = requests.post(f"{backend_api_url}/chat", json=payload, headers=get_headers(idempotency_key))
 
         if response.status_code == 500:
             message = get_user_error()
@@ -125,8 +139,67 @@ def chat(login_session_id: str, chat_session_id: str, question: str, question_ka
         frontend_logger.error(f"chat | Server error | Error: {str(e)}")
     return success, message, data
 
+# Function to ask the backend API (/speculate-answers) to pre-answer the suggested next questions of a chat session.
+# The answers are kept as uncommitted drafts on the backend, and a later /chat call with input_type="button" commits the matching one.
+def speculate_answers(login_session_id: str, chat_session_id: str, questions: list, user_email: str, user_full_name: str, student_name: str) -> tuple[bool, str]:
+    success = False
+    message = ""
+    try:
+        payload = {
+            "login_session_id": login_session_id,
+            "chat_session_id": chat_session_id,
+            "questions": questions,
+            "user_email": user_email,
+            "user_full_name": user_full_name,
+            "student_name": student_name
+        }
+        idempotency_key = get_idempotency_key("speculate-answers", login_session_id, chat_session_id, *questions)
+        response = requests.post(f"{backend_api_url}/speculate-answers", json=payload, headers=get_headers(idempotency_key), timeout=10)
+
+        if response.status_code in (200, 202):
+            success = True
+            message = response.json()["message"]
+            frontend_logger.info(f"speculate_answers | {message}")
+        else:
+            message = get_user_error()
+            frontend_logger.error(f"speculate_answers | Server error | Response Status Code: {response.status_code}")
+    except Exception as e:
+        message = get_user_error()
+        frontend_logger.error(f"speculate_answers | Server error | Error: {str(e)}")
+    return success, message
+
+# Function to store the suggested next questions of a chat session as its resume snapshot via the backend API (/update-session-snapshot).
+# message_count is the message count of the session item the questions were generated at; /get-active-sessions only returns
+# the snapshot while it still matches. latest_turn is the question and answer of the turn the questions follow.
+def update_session_snapshot(login_session_id: str, chat_session_id: str, next_questions: list, message_count: int, latest_turn: dict | None = None) -> tuple[bool, str]:
+    success = False
+    message = ""
+    try:
+        payload = {
+            "login_session_id": login_session_id,
+            "chat_session_id": chat_session_id,
+            "next_questions": next_questions,
+            "message_count": message_count,
+            "latest_turn": latest_turn
+        }
+        response = requests.post(f"{backend_api_url}/update-session-snapshot", json=payload, headers=headers, timeout=BACKEND_API_TIMEOUT_SECONDS)
+
+        if response.status_code == 200:
+            success = True
+            message = response.json()["message"]
+            frontend_logger.info(f"update_session_snapshot | {message}")
+        else:
+            message = get_user_error()
+            frontend_logger.error(f"update_session_snapshot | Server error | Response Status Code: {response.status_code}")
+    except Exception as e:
+        message = get_user_error()
+        frontend_logger.error(f"update_session_snapshot | Server error | Error: {str(e)}")
+    return success, message
+
 # Function to end all active chat sessions for a user login via the backend API (/end-all-chats).
-def end_all_chats(user_email: str, login_session_id: str) -> tuple[bool, str]:
+# request_nonce identifies one "end all chats" action: retries of the action reuse it, and a later action must use a new one
+# so that it is not replayed from the result of the previous one.
+def end_all_chats(user_email: str, login_session_id: str, request_nonce: str) -> tuple[bool, str]:
     success = False
     message = ""
     try:
@@ -134,7 +207,8 @@ def end_all_chats(user_email: str, login_session_id: str) -> tuple[bool, str]:
             "user_email": user_email,
             "login_session_id": login_session_id
         }
-        response = requests.post(f"{backend_api_url}/end-all-chats", json=payload, headers=headers)
+        idempotency_key = get_idempotency_key("end-all-chats", user_email, login_session_id, request_nonce)
+        response = requests.post(f"{backend_api_url}/end-all-chats", json=payload, headers=get_headers(idempotency_key))
 
         if response.status_code == 200:
             success = True
@@ -185,7 +259,7 @@ def get_chat_history_messages(login_session_id: str, chat_session_id: str) -> tu
             "login_session_id": login_session_id,
             "chat_session_id": chat_session_id
         }
-        response = requests.post(f"{backend_api_url}/get-chat-history", json=payload, headers=headers)
+        response = requests.post(f"{backend_api_url}/get-chat-history", json=payload, headers=headers, timeout=BACKEND_API_TIMEOUT_SECONDS)
 
         if response.status_code == 200:
             success = True
@@ -0,0 +1,114 @@
+import argparse
+import sys
+import tracemalloc
+
+from typing import Iterator
+
+# Compact record of one chat message kept in st.session_state["active_chat_session"]["chat_history"].
+# Roles and avatar URLs are interned, so every message of a session shares the same string objects, and the English content
+# is only stored when it differs from the displayed content (Kannada input). Reading it like the dict it replaces
+# (message["content-en"], message.get("avatar")) keeps the render functions unchanged.
+class ChatMessage:
+    __slots__ = ("role", "content", "_content_en", "avatar")
+
+    KEYS = ("role", "content", "content-en", "avatar")
+
+    def __init__(self, role: str, content: str, content_en: str | None = None, avatar: str | None = None):
+        self.role = sys.intern(role)
+        self.content = content
+        self._content_en = content_en if content_en is not None and content_en != content else None
+        self.avatar = sys.intern(avatar) if avatar is not None else None
+
+    @property
+    def content_en(self) -> str:
+        return self.content if self._content_en is None else self._content_en
+
+    def __getitem__(self, key: str):
+        if key == "role":
+            return self.role
+        if key == "content":
+            return self.content
+        if key == "content-en":
+            return self.content_en
+        if key == "avatar":
+            return self.avatar
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self) -> dict:
+        return {key: self[key] for key in self.KEYS}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ChatMessage, dict)):
+            return all(self.get(key) == other.get(key) for key in self.KEYS)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ChatMessage(role={self.role!r}, content={self.content[:40]!r}, avatar={self.avatar!r})"
+
+    def __getstate__(self):
+        return (self.role, self.content, self._content_en, self.avatar)
+
+    def __setstate__(self, state):
+        role, content, content_en, avatar = state
+        self.role = sys.intern(role)
+        self.content = content
+        self._content_en = content_en
+        self.avatar = sys.intern(avatar) if avatar is not None else None
+
+# Function to measure the memory of chat histories held as dicts versus ChatMessage records, with realistic session counts.
+# Avatar URLs are built per message, as the pages do with str.format, so the dict version holds one copy per message.
+def benchmark_chat_history_memory(sessions: int, messages_per_session: int, message_length: int) -> dict:
+    def build_histories(compact: bool) -> list:
+        histories = []
+        for session in range(sessions):
+            history = []
+            user_avatar_template = "https://lh3.googleusercontent.com/a/{user}=s96-c"
+            student_avatar_template = "https://agastya.example.org/static/students/{student}.png"
+            for index in range(messages_per_session):
+                role = "user" if index % 2 == 0 else "assistant"
+                content = f"{session}:{index} " + "x" * message_length
+                avatar = user_avatar_template.format(user=f"user-{session}") if role == "user" else student_avatar_template.format(student=f"student-{session % 8}")
+                if compact:
+                    history.append(ChatMessage(role=role, content=content, content_en=content, avatar=avatar))
+                else:
+                    history.append({"role": role, "content": content, "content-en": content, "avatar": avatar})
+            histories.append(history)
+        return histories
+
+    results = {}
+    for name, compact in (("dict", False), ("ChatMessage", True)):
+        tracemalloc.start()
+        histories = build_histories(compact)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = current
+        del histories
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the memory of in-memory chat histories.")
+    parser.add_argument("--sessions", type=int, default=300, help="Concurrent chat sessions on the node")
+    parser.add_argument("--messages", type=int, default=40, help="Messages per session")
+    parser.add_argument("--length", type=int, default=400, help="Characters per message")
+    args = parser.parse_args()
+
+    results = benchmark_chat_history_memory(args.sessions, args.messages, args.length)
+    baseline = results["dict"]
+    print(f"{args.sessions} sessions x {args.messages} messages x {args.length} chars")
+    for name, size in results.items():
+        print(f"{name:<12} {size / 2**20:>9.2f} MiB {size / baseline:>6.2f}x")
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from config.frontend.other import (
+    HISTORY_PREFETCH_MAX_CONCURRENCY,
+    HISTORY_PREFETCH_TTL_SECONDS
+)
+from utils.shared.logger import frontend_logger
+from utils.shared.metrics import get_metric_rate, increment_metric
+from typing import Callable
+
+# Histories of the resumable chat sessions of the node, fetched while the students page is shown so that "Resume Chat"
+# does not wait for them. Entries are keyed by login and chat session id, expire after ttl_seconds and are removed when taken.
+class HistoryPrefetcher:
+    def __init__(self, max_concurrency: int = HISTORY_PREFETCH_MAX_CONCURRENCY, ttl_seconds: int = HISTORY_PREFETCH_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="history-prefetch")
+        self.entries: dict[tuple[str, str], tuple[Future, float]] = {}
+        self.lock = threading.Lock()
+
+    # Start fetching the history of a session unless a fresh fetch is already cached. load returns (success, message, history).
+    def prefetch(self, login_session_id: str, chat_session_id: str, load: Callable[..., tuple[bool, str, list]], **kwargs):
+        key = (login_session_id, chat_session_id)
+        now = time.monotonic()
+        with self.lock:
+            self.discard_expired(now)
+            if key in self.entries:
+                return
+            self.entries[key] = (self.executor.submit(load, login_session_id=login_session_id, chat_session_id=chat_session_id, **kwargs), now)
+        increment_metric("history_prefetch.started")
+
+    # Take the prefetched history of a session, or None when it was not prefetched, has expired or failed.
+    # A fetch still queued behind other prefetches is cancelled and None is returned, so that the resume loads the history
+    # on its own executor instead of waiting for its turn here.
+    def take(self, login_session_id: str, chat_session_id: str) -> Future | None:
+        with self.lock:
+            self.discard_expired(time.monotonic())
+            entry = self.entries.pop((login_session_id, chat_session_id), None)
+
+        future = entry[0] if entry is not None else None
+        if future is not None and (future.cancel() or (future.done() and not future.result()[0])):
+            future = None
+        increment_metric("history_prefetch.requests")
+        increment_metric("history_prefetch.hits" if future is not None else "history_prefetch.misses")
+        frontend_logger.info(
+            f"HistoryPrefetcher.take | {'Hit' if future is not None else 'Miss'} for chat session id: {chat_session_id} "
+            f"| hit rate: {get_metric_rate('history_prefetch.hits', 'history_prefetch.requests'):.2%}"
+        )
+        return future
+
+    # Drop expired entries. Must be called with the lock held.
+    def discard_expired(self, now: float):
+        for key in [key for key, (_, created_at) in self.entries.items() if now - created_at > self.ttl_seconds]:
+            del self.entries[key]
+
+_history_prefetcher = HistoryPrefetcher()
+
+# Function to get the process-wide history prefetcher.
+def get_history_prefetcher() -> HistoryPrefetcher:
+    return _history_prefetcher
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+
+from collections import OrderedDict, deque
+from config.frontend.llm import (
+    LLM_INITIAL_CONCURRENCY,
+    LLM_MAX_CONCURRENCY,
+    LLM_MIN_CONCURRENCY
+)
+from contextlib import asynccontextmanager
+from utils.shared.logger import frontend_logger
+from utils.shared.metrics import get_metric_rate, increment_metric
+
+# Error codes and names of Bedrock throttling responses.
+THROTTLING_ERROR_NAMES = ("ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException", "Too many requests")
+
+# Function to check whether an exception raised by an LLM call is a throttling response.
+def is_throttling_error(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    error_code = response.get("Error", {}).get("Code", "") if isinstance(response, dict) else ""
+    text = f"{type(error).__name__} {error_code} {error}"
+    return any(name in text for name in THROTTLING_ERROR_NAMES)
+
+# Process-wide limiter of concurrent LLM calls shared by every Streamlit session of the node.
+# The concurrency limit follows AIMD: +1 per limit's worth of successful calls, halved on each throttling response.
+# Waiting calls are served round-robin across users, so one user's burst cannot starve the others.
+# The node's only LLM calls are the suggested next questions, so calls are not prioritized: the answers of turns are generated
+# by the backend behind /chat, whose Bedrock calls this governor neither sees nor limits.
+# Streamlit runs each session in its own thread with its own event loop, so the governor is thread-based.
+class LLMConcurrencyGovernor:
+    def __init__(self, initial_limit: int = LLM_INITIAL_CONCURRENCY, min_limit: int = LLM_MIN_CONCURRENCY, max_limit: int = LLM_MAX_CONCURRENCY):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.active = 0
+        self.queue: OrderedDict[str, deque] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_queue_depth(self) -> int:
+        return sum(len(waiters) for waiters in self.queue.values())
+
+    # Grant free slots to waiting calls, one call per user in turn. Must be called with the lock held.
+    def dispatch(self):
+        while self.active < int(self.limit) and self.queue:
+            user_id, waiters = next(iter(self.queue.items()))
+            waiter = waiters.popleft()
+            del self.queue[user_id]
+            if waiters:
+                self.queue[user_id] = waiters
+            self.active += 1
+            waiter.set()
+
+    # Queue a call for a slot. The returned event is set once the slot is granted.
+    def enqueue(self, user_id: str) -> threading.Event:
+        waiter = threading.Event()
+        with self.lock:
+            self.queue.setdefault(user_id, deque()).append(waiter)
+            self.dispatch()
+        return waiter
+
+    # Give up a queued call: it is removed from its queue, or, if its slot was granted in the meantime, the slot is freed.
+    # The event is set either way, so that a thread still waiting on it returns.
+    def cancel(self, waiter: threading.Event, user_id: str):
+        with self.lock:
+            waiters = self.queue.get(user_id)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self.queue[user_id]
+            elif waiter.is_set():
+                self.active -= 1
+            waiter.set()
+            self.dispatch()
+        increment_metric("llm_governor.cancelled")
+
+    # Count a granted call and log the state of the governor with it.
+    def record_wait(self, started_at: float) -> float:
+        wait_seconds = time.monotonic() - started_at
+        increment_metric("llm_governor.calls")
+        increment_metric("llm_governor.wait_seconds", wait_seconds)
+        with self.lock:
+            limit, active, queue_depth = int(self.limit), self.active, self.get_queue_depth()
+        frontend_logger.info(
+            f"LLMConcurrencyGovernor.record_wait | Slot granted after {wait_seconds:.2f}s "
+            f"| concurrency limit: {limit} | active: {active} | queued: {queue_depth} "
+            f"| mean wait: {get_metric_rate('llm_governor.wait_seconds', 'llm_governor.calls'):.2f}s "
+            f"| throttled rate: {get_metric_rate('llm_governor.throttled', 'llm_governor.calls'):.2%}"
+        )
+        return wait_seconds
+
+    # Wait for a slot. Returns the time spent waiting, in seconds.
+    def acquire(self, user_id: str) -> float:
+        started_at = time.monotonic()
+        self.enqueue(user_id).wait()
+        return self.record_wait(started_at)
+
+    # Free a slot and adapt the limit to how the call ended.
+    def release(self, throttled: bool = False):
+        with self.lock:
+            self.active -= 1
+            if throttled:
+                self.limit = max(float(self.min_limit), self.limit / 2)
+                increment_metric("llm_governor.throttled")
+                frontend_logger.warning(f"LLMConcurrencyGovernor.release | Throttled, concurrency limit lowered to {int(self.limit)}")
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self.dispatch()
+
+    # Run an LLM call of a user under the governor from async code, without blocking the session's event loop while waiting.
+    # If the task is cancelled while waiting, its queued call is withdrawn, or the slot granted to it is freed.
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        started_at = time.monotonic()
+        waiter = self.enqueue(user_id)
+        try:
+            await asyncio.to_thread(waiter.wait)
+        except asyncio.CancelledError:
+            self.cancel(waiter, user_id)
+            raise
+        self.record_wait(started_at)
+        throttled = False
+        try:
+            yield
+        except Exception as e:
+            throttled = is_throttling_error(e)
+            raise
+        finally:
+            self.release(throttled=throttled)
+
+_llm_governor = LLMConcurrencyGovernor()
+
+# Function to get the process-wide LLM concurrency governor.
+def get_llm_governor() -> LLMConcurrencyGovernor:
+    return _llm_governor
+
+if __name__ == "__main__":
+    pass
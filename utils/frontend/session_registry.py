@@ -0,0 +1,134 @@
+import sys
+import threading
+import time
+import weakref
+
+from contextlib import contextmanager
+from config.frontend.other import (
+    CHAT_HISTORY_MEMORY_CEILING_BYTES,
+    CHAT_SESSION_IDLE_TRIM_SECONDS
+)
+from utils.shared.logger import frontend_logger
+from utils.shared.metrics import increment_metric, set_metric
+
+# Minimum interval between two sweeps of the registry.
+SWEEP_INTERVAL_SECONDS = 30
+
+# Activity of one browser session's chat, stored in its active_chat_session so that it lives and dies with the Streamlit session.
+class ChatSessionActivity:
+    __slots__ = ("chat_session", "last_active", "history_bytes", "counted_history", "counted_messages", "turns_in_flight", "__weakref__")
+
+    def __init__(self, chat_session: dict):
+        self.chat_session = chat_session
+        self.last_active = time.monotonic()
+        self.history_bytes = 0
+        self.counted_history = None
+        self.counted_messages = 0
+        self.turns_in_flight = 0
+
+    # Add the messages appended to the chat history since the last count to history_bytes, so that a turn only counts its own messages.
+    # A history replaced by a load or a trim is counted from scratch.
+    def count_history(self):
+        chat_history = self.chat_session.get("chat_history", [])
+        if chat_history is not self.counted_history or len(chat_history) < self.counted_messages:
+            self.counted_history = chat_history
+            self.counted_messages = 0
+            self.history_bytes = 0
+        self.history_bytes += get_chat_history_bytes(chat_history[self.counted_messages:])
+        self.counted_messages = len(chat_history)
+
+    # Replace the chat history with an empty stub; get_chat_history_formatted reloads it when the session comes back.
+    def trim(self) -> int:
+        freed_bytes = self.history_bytes
+        self.chat_session["chat_history"] = []
+        self.chat_session["history_trimmed"] = True
+        self.count_history()
+        return freed_bytes
+
+# Function to estimate the memory held by a chat history.
+def get_chat_history_bytes(chat_history: list) -> int:
+    total_bytes = 0
+    for message in chat_history:
+        content = message.get("content") or ""
+        content_en = message.get("content-en") or ""
+        total_bytes += sys.getsizeof(message) + sys.getsizeof(content)
+        if content_en is not content:
+            total_bytes += sys.getsizeof(content_en)
+    return total_bytes
+
+# Registry of the chat sessions of every browser session on the node. Entries are weak, so a session that Streamlit
+# drops disappears from the registry with it.
+class ChatSessionRegistry:
+    def __init__(self, idle_seconds: int = CHAT_SESSION_IDLE_TRIM_SECONDS, max_bytes: int = CHAT_HISTORY_MEMORY_CEILING_BYTES):
+        self.idle_seconds = idle_seconds
+        self.max_bytes = max_bytes
+        self.activities: "weakref.WeakSet[ChatSessionActivity]" = weakref.WeakSet()
+        self.last_sweep = 0.0
+        self.lock = threading.Lock()
+
+    def get_activity(self, chat_session: dict) -> ChatSessionActivity:
+        activity = chat_session.get("activity")
+        if not isinstance(activity, ChatSessionActivity):
+            activity = ChatSessionActivity(chat_session)
+            chat_session["activity"] = activity
+        return activity
+
+    # Mark a chat session as active and trim idle ones if a sweep is due.
+    def touch(self, chat_session: dict):
+        activity = self.get_activity(chat_session)
+        with self.lock:
+            self.activities.add(activity)
+            activity.last_active = time.monotonic()
+            activity.count_history()
+            if activity.last_active - self.last_sweep >= SWEEP_INTERVAL_SECONDS:
+                self.last_sweep = activity.last_active
+                self.sweep(current=activity)
+
+    # Mark a chat session as having a turn in flight for the duration of the block. Its history is never trimmed meanwhile,
+    # since the turn reads its length and appends to it. The session is touched when the turn starts and once it ends.
+    @contextmanager
+    def turn(self, chat_session: dict):
+        activity = self.get_activity(chat_session)
+        with self.lock:
+            activity.turns_in_flight += 1
+        try:
+            self.touch(chat_session)
+            yield
+        finally:
+            with self.lock:
+                activity.turns_in_flight -= 1
+            self.touch(chat_session)
+
+    # Trim sessions idle beyond idle_seconds, then the least recently active ones while the node is above max_bytes.
+    # The current session and sessions with a turn in flight are skipped. When the skipped sessions alone hold max_bytes or more,
+    # trimming the others cannot bring the node under the ceiling, so only idle sessions are trimmed. Must be called with the lock held.
+    def sweep(self, current: ChatSessionActivity = None):
+        now = time.monotonic()
+        activities = sorted(self.activities, key=lambda activity: activity.last_active)
+        trimmable = [activity for activity in activities if activity is not current and activity.history_bytes and not activity.turns_in_flight]
+        total_bytes = sum(activity.history_bytes for activity in activities)
+        skipped_bytes = total_bytes - sum(activity.history_bytes for activity in trimmable)
+        if skipped_bytes >= self.max_bytes:
+            frontend_logger.warning(f"ChatSessionRegistry.sweep | Active sessions alone hold {skipped_bytes} bytes, above the ceiling of {self.max_bytes}; only trimming idle sessions")
+        trimmed = 0
+        for activity in trimmable:
+            over_ceiling = total_bytes > self.max_bytes and skipped_bytes < self.max_bytes
+            if now - activity.last_active <= self.idle_seconds and not over_ceiling:
+                break
+            total_bytes -= activity.trim()
+            trimmed += 1
+
+        increment_metric("chat_session_registry.trimmed", trimmed)
+        set_metric("chat_session_registry.sessions", len(activities))
+        set_metric("chat_session_registry.history_bytes", total_bytes)
+        if trimmed:
+            frontend_logger.info(f"ChatSessionRegistry.sweep | Trimmed {trimmed} chat histories, {total_bytes} bytes held by {len(activities)} sessions")
+
+_chat_session_registry = ChatSessionRegistry()
+
+# Function to get the node-wide chat session registry.
+def get_chat_session_registry() -> ChatSessionRegistry:
+    return _chat_session_registry
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,36 @@
+import threading
+
+from typing import Dict
+
+# Process-wide counters and gauges. Values are kept in memory and read back with get_metrics(), e.g. for a health endpoint or periodic logging.
+_metrics_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+
+# Function to add to a counter.
+def increment_metric(name: str, value: float = 1) -> None:
+    with _metrics_lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+# Function to set a gauge to its latest value.
+def set_metric(name: str, value: float) -> None:
+    with _metrics_lock:
+        _gauges[name] = value
+
+# Function to get the current value of a counter or gauge.
+def get_metric(name: str, default: float = 0) -> float:
+    with _metrics_lock:
+        if name in _gauges:
+            return _gauges[name]
+        return _counters.get(name, default)
+
+# Function to get the ratio of two counters, e.g. a hit or skip rate.
+def get_metric_rate(numerator: str, denominator: str) -> float:
+    with _metrics_lock:
+        total = _counters.get(denominator, 0)
+        return _counters.get(numerator, 0) / total if total else 0.0
+
+# Function to get a snapshot of every counter and gauge.
+def get_metrics() -> Dict[str, float]:
+    with _metrics_lock:
+        return {**_counters, **_gauges}